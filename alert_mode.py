@@ -4,17 +4,7 @@
 # License: MIT
 
 import time
-import machine
-from neopixel import NeoPixel
-
-# --- Setup ---
-pin = machine.Pin(4, machine.Pin.OUT)
-np = NeoPixel(pin, 1)
-
-def set_color(r, g, b, brightness=1.0):
-    """Set NeoPixel color at specified brightness."""
-    np[0] = (int(r * brightness), int(g * brightness), int(b * brightness))
-    np.write()
+from led_core import set_color, set_level, frame, make_ramp, play_ramp, blink, show, OFF, LEVEL_MAX
 
 # --- Core Alert Functions ---
 
@@ -27,11 +17,7 @@ def pulse_alert(color=(255, 80, 80), flashes=3, speed=0.25):
         flashes: Number of pulses (default: 3)
         speed: Duration of each on/off cycle in seconds (default: 0.25)
     """
-    for _ in range(flashes):
-        set_color(*color, brightness=1.0)
-        time.sleep(speed)
-        set_color(0, 0, 0, 0)
-        time.sleep(speed)
+    blink(frame(color), flashes, speed, speed)
 
 def double_tap(color=(100, 200, 255), pause=0.15):
     """
@@ -41,11 +27,7 @@ def double_tap(color=(100, 200, 255), pause=0.15):
         color: RGB tuple (default: light blue)
         pause: Time between taps in seconds (default: 0.15)
     """
-    for _ in range(2):
-        set_color(*color, brightness=1.0)
-        time.sleep(0.1)
-        set_color(0, 0, 0, 0)
-        time.sleep(pause)
+    blink(frame(color), 2, 0.1, pause)
 
 def urgent_flash(color=(255, 0, 0), count=5, speed=0.1):
     """
@@ -56,11 +38,7 @@ def urgent_flash(color=(255, 0, 0), count=5, speed=0.1):
         count: Number of flashes (default: 5)
         speed: Duration of each flash in seconds (default: 0.1)
     """
-    for _ in range(count):
-        set_color(*color, brightness=1.0)
-        time.sleep(speed)
-        set_color(0, 0, 0, 0)
-        time.sleep(speed)
+    blink(frame(color), count, speed, speed)
 
 def success_pulse(color=(0, 255, 100), duration=1.5):
     """
@@ -72,18 +50,13 @@ def success_pulse(color=(0, 255, 100), duration=1.5):
     """
     steps = 30
     step_time = duration / (steps * 2)
+    ramp = make_ramp(color, steps + 1)
     
     # Fade in
-    for i in range(steps):
-        brightness = i / steps
-        set_color(*color, brightness=brightness)
-        time.sleep(step_time)
+    play_ramp(memoryview(ramp)[:-3], step_time)
     
     # Fade out
-    for i in range(steps, -1, -1):
-        brightness = i / steps
-        set_color(*color, brightness=brightness)
-        time.sleep(step_time)
+    play_ramp(ramp, step_time, True)
     
     set_color(0, 0, 0, 0)
 
@@ -95,19 +68,17 @@ def warning_pulse(color=(255, 165, 0), cycles=2):
         color: RGB tuple (default: orange)
         cycles: Number of complete pulse cycles (default: 2)
     """
+    ramp = make_ramp(color, 11)  # 0-100% in 10% steps
+    
     for _ in range(cycles):
         # Fade in
-        for brightness in range(0, 101, 10):
-            set_color(*color, brightness=brightness/100)
-            time.sleep(0.05)
+        play_ramp(ramp, 0.05)
         
         # Hold
         time.sleep(0.2)
         
         # Fade out
-        for brightness in range(100, -1, -10):
-            set_color(*color, brightness=brightness/100)
-            time.sleep(0.05)
+        play_ramp(ramp, 0.05, True)
         
         time.sleep(0.2)
 
@@ -119,18 +90,23 @@ def heartbeat(color=(255, 50, 100), beats=3):
         color: RGB tuple (default: pink-red)
         beats: Number of heartbeat cycles (default: 3)
     """
+    bright = frame(color)
+    dim = frame(color, 38)  # ~30%
+    _show = show
+    _sleep = time.sleep
+    
     for _ in range(beats):
         # First beat
-        set_color(*color, brightness=1.0)
-        time.sleep(0.1)
-        set_color(*color, brightness=0.3)
-        time.sleep(0.1)
+        _show(bright)
+        _sleep(0.1)
+        _show(dim)
+        _sleep(0.1)
         
         # Second beat
-        set_color(*color, brightness=1.0)
-        time.sleep(0.1)
-        set_color(0, 0, 0, 0)
-        time.sleep(0.5)
+        _show(bright)
+        _sleep(0.1)
+        _show(OFF)
+        _sleep(0.5)
 
 def morse_pattern(color=(255, 255, 255), pattern="SOS"):
     """
@@ -161,7 +137,7 @@ def morse_pattern(color=(255, 255, 255), pattern="SOS"):
         
         if char in morse_dict:
             for symbol in morse_dict[char]:
-                set_color(*color, brightness=1.0)
+                set_level(*color, LEVEL_MAX)
                 if symbol == '.':
                     time.sleep(0.1)  # Dot
                 else:
@@ -173,14 +149,15 @@ def morse_pattern(color=(255, 255, 255), pattern="SOS"):
 
 # --- Preset Alert Types ---
 
+# name -> (pattern function, positional args)
 ALERT_PRESETS = {
-    "reminder": lambda: pulse_alert((255, 200, 100), flashes=2, speed=0.3),
-    "notification": lambda: double_tap((100, 200, 255)),
-    "success": lambda: success_pulse((0, 255, 100)),
-    "warning": lambda: warning_pulse((255, 165, 0)),
-    "error": lambda: urgent_flash((255, 0, 0), count=4),
-    "message": lambda: heartbeat((150, 100, 255), beats=2),
-    "alarm": lambda: urgent_flash((255, 0, 0), count=10, speed=0.08),
+    "reminder": (pulse_alert, ((255, 200, 100), 2, 0.3)),      # 2 flashes, 0.3s
+    "notification": (double_tap, ((100, 200, 255),)),
+    "success": (success_pulse, ((0, 255, 100),)),
+    "warning": (warning_pulse, ((255, 165, 0),)),
+    "error": (urgent_flash, ((255, 0, 0), 4)),                  # 4 flashes
+    "message": (heartbeat, ((150, 100, 255), 2)),               # 2 beats
+    "alarm": (urgent_flash, ((255, 0, 0), 10, 0.08)),           # 10 flashes, 0.08s
 }
 
 def trigger_alert(alert_type):
@@ -190,9 +167,11 @@ def trigger_alert(alert_type):
     Args:
         alert_type: String key from ALERT_PRESETS
     """
-    if alert_type in ALERT_PRESETS:
+    preset = ALERT_PRESETS.get(alert_type)
+    if preset is not None:
         print(f"[Alert] Triggering: {alert_type}")
-        ALERT_PRESETS[alert_type]()
+        func, args = preset
+        func(*args)
     else:
         print(f"[Alert] Unknown type: {alert_type}")
         pulse_alert()  # Default fallback
@@ -5,19 +5,39 @@
 
 import time
 import math
-from neopixel import NeoPixel
-import machine
+import random
+import micropython
+from led_core import set_color, set_level, make_ramp, play_ramp, LEVEL_MAX
 
-pin = machine.Pin(4, machine.Pin.OUT)
-np = NeoPixel(pin, 1)
+# Sine wave from 0 to 1 and back for sinusoidal_breath, peak 60% = 153/255
+_SIN_STEPS = 60
+_SIN_LUT = bytearray(
+    int((1 + math.sin((s / _SIN_STEPS) * 2 * math.pi - math.pi/2)) / 2 * 153)
+    for s in range(_SIN_STEPS)
+)
 
-def set_color(r, g, b, brightness=0.5):
-    """Set LED color with brightness control."""
-    np[0] = (int(r*brightness), int(g*brightness), int(b*brightness))
-    np.write()
+# --- Fade Helper ---
+
+def _play_fade(ramp, step_time, reverse=False):
+    """
+    Play a precomputed fade ramp from make_ramp().
+    
+    Fading in stops one step short of the peak (the hold that follows
+    shows it); fading out runs the whole ramp back down to off.
+    
+    Args:
+        ramp: GRB bytearray from make_ramp()
+        step_time: Seconds per step
+        reverse: True to fade out (default: False)
+    """
+    if reverse:
+        play_ramp(ramp, step_time, True)
+    else:
+        play_ramp(memoryview(ramp)[:-3], step_time)
 
 # --- Core Calming Patterns ---
 
+@micropython.native
 def slow_breath(color=(255, 215, 0), cycles=5, speed=0.1):
     """
     A slower, softer breathing pattern for relaxation.
@@ -27,28 +47,39 @@ def slow_breath(color=(255, 215, 0), cycles=5, speed=0.1):
         cycles: Number of breath cycles (default: 5)
         speed: Time between brightness steps (default: 0.1s)
     """
+    ramp = make_ramp(color, 51)  # 0-100% in 2% steps
+    
     for _ in range(cycles):
-        # Inhale
-        for i in range(0, 101, 2):
-            set_color(*color, i/100)
-            time.sleep(speed)
-        # Exhale
-        for i in range(100, -1, -2):
-            set_color(*color, i/100)
-            time.sleep(speed)
+        play_ramp(ramp, speed)        # Inhale
+        play_ramp(ramp, speed, True)  # Exhale
 
-def color_wave(colors, cycles=3, speed=0.08):
+@micropython.native
+def color_wave(colors, cycles=3, speed=0.08, steps=51):
     """
-    Gently transition through a list of colors.
+    Gently cross-fade through a list of colors, wrapping back to the first.
     
     Args:
         colors: List of RGB tuples
         cycles: Number of times to cycle through colors (default: 3)
-        speed: Transition speed (default: 0.08s)
+        speed: Transition speed (default: 0.08s per step)
+        steps: Steps per color-to-color transition (default: 51)
     """
+    # One GRB frame per step for the whole loop, built once
+    n = len(colors)
+    wave = bytearray(3 * steps * n)
+    i = 0
+    for k in range(n):
+        r1, g1, b1 = colors[k]
+        r2, g2, b2 = colors[(k + 1) % n]
+        for t in range(steps):
+            rest = steps - t
+            wave[i] = (g1 * rest + g2 * t) // steps
+            wave[i + 1] = (r1 * rest + r2 * t) // steps
+            wave[i + 2] = (b1 * rest + b2 * t) // steps
+            i += 3
+    
     for _ in range(cycles):
-        for c in colors:
-            slow_breath(c, cycles=1, speed=speed)
+        play_ramp(wave, speed)
 
 def deep_breath(color=(100, 150, 255), hold_time=2.0, speed=0.15):
     """
@@ -60,25 +91,21 @@ def deep_breath(color=(100, 150, 255), hold_time=2.0, speed=0.15):
         speed: Breathing rate (default: 0.15s per step)
     """
     steps = 30
+    ramp = make_ramp(color, steps + 1, 178)  # Peak 70%
     
     # Inhale
-    for i in range(steps):
-        brightness = i / steps
-        set_color(*color, brightness=brightness * 0.7)
-        time.sleep(speed)
+    _play_fade(ramp, speed)
     
     # Hold (full)
     time.sleep(hold_time)
     
     # Exhale
-    for i in range(steps, -1, -1):
-        brightness = i / steps
-        set_color(*color, brightness=brightness * 0.7)
-        time.sleep(speed)
+    _play_fade(ramp, speed, True)
     
     # Hold (empty)
     time.sleep(hold_time)
 
+@micropython.native
 def sinusoidal_breath(color=(255, 200, 150), duration=8.0, cycles=5):
     """
     Ultra-smooth breathing using sine wave for natural rhythm.
@@ -88,17 +115,21 @@ def sinusoidal_breath(color=(255, 200, 150), duration=8.0, cycles=5):
         duration: Duration of one complete breath cycle (default: 8.0s)
         cycles: Number of breath cycles (default: 5)
     """
-    steps = 60
+    steps = _SIN_STEPS
     step_time = duration / steps
+    r, g, b = color
+    
+    ramp = bytearray(3 * steps)
+    for step in range(steps):
+        br = _SIN_LUT[step] + 1
+        ramp[3 * step] = (g * br) >> 8
+        ramp[3 * step + 1] = (r * br) >> 8
+        ramp[3 * step + 2] = (b * br) >> 8
     
     for _ in range(cycles):
-        for step in range(steps):
-            # Sine wave from 0 to 1 and back
-            brightness = (1 + math.sin((step / steps) * 2 * math.pi - math.pi/2)) / 2
-            set_color(*color, brightness=brightness * 0.6)
-            time.sleep(step_time)
+        play_ramp(ramp, step_time)
 
-def gentle_pulse(color=(200, 150, 255), min_brightness=0.1, max_brightness=0.5, speed=0.12):
+def gentle_pulse(color=(200, 150, 255), min_brightness=0.1, max_brightness=0.5, speed=0.12, max_cycles=None):
     """
     Very gentle, continuous pulsing - perfect for ambient meditation.
     
@@ -107,20 +138,27 @@ def gentle_pulse(color=(200, 150, 255), min_brightness=0.1, max_brightness=0.5,
         min_brightness: Minimum brightness level (default: 0.1)
         max_brightness: Maximum brightness level (default: 0.5)
         speed: Pulse rate (default: 0.12s)
+        max_cycles: Number of pulses before returning (None = indefinite)
+    
+    One pulse is 41 steps, i.e. 41 * speed seconds.
     """
-    while True:
+    low = int(min_brightness * LEVEL_MAX)
+    span = int(max_brightness * LEVEL_MAX) - low
+    
+    cycle = 0
+    while max_cycles is None or cycle < max_cycles:
+        cycle += 1
         # Fade up
         for i in range(20):
-            brightness = min_brightness + (max_brightness - min_brightness) * (i / 20)
-            set_color(*color, brightness=brightness)
+            set_level(*color, low + (span * i) // 20)
             time.sleep(speed)
         
         # Fade down
         for i in range(20, -1, -1):
-            brightness = min_brightness + (max_brightness - min_brightness) * (i / 20)
-            set_color(*color, brightness=brightness)
+            set_level(*color, low + (span * i) // 20)
             time.sleep(speed)
 
+@micropython.native
 def sunset_fade(duration=180.0):
     """
     Gradual warm-to-cool transition over 3 minutes, mimicking sunset.
@@ -131,20 +169,25 @@ def sunset_fade(duration=180.0):
     steps = 200
     step_time = duration / steps
     
+    ramp = bytearray(3 * steps)
     for step in range(steps):
-        progress = step / steps
+        rest = steps - step
         
         # Transition from warm orange to deep blue
-        r = int(255 * (1 - progress) + 20 * progress)
-        g = int(140 * (1 - progress) + 40 * progress)
-        b = int(0 * (1 - progress) + 80 * progress)
+        r = (255 * rest + 20 * step) // steps
+        g = (140 * rest + 40 * step) // steps
+        b = (80 * step) // steps
         
-        brightness = 0.8 * (1 - progress * 0.7)  # Gradually dim
-        set_color(r, g, b, brightness=brightness)
-        time.sleep(step_time)
+        # Gradually dim from 80% (205) towards 24% (62)
+        br = 205 - (143 * step) // steps
+        ramp[3 * step] = (g * br) >> 8
+        ramp[3 * step + 1] = (r * br) >> 8
+        ramp[3 * step + 2] = (b * br) >> 8
+    
+    play_ramp(ramp, step_time)
     
     # Final state: very dim blue
-    set_color(20, 40, 80, brightness=0.2)
+    set_color(20, 40, 80, 0.2)
 
 def ocean_waves(cycles=10, wave_speed=0.08):
     """
@@ -161,9 +204,7 @@ def ocean_waves(cycles=10, wave_speed=0.08):
         (80, 180, 255),   # Sky blue
     ]
     
-    for _ in range(cycles):
-        for color in colors:
-            slow_breath(color, cycles=1, speed=wave_speed)
+    color_wave(colors, cycles, wave_speed)
 
 def forest_ambiance(duration=120.0):
     """
@@ -185,12 +226,12 @@ def forest_ambiance(duration=120.0):
     total_steps = len(colors) * steps_per_color
     step_time = duration / total_steps
     
+    # Whole schedule built up front: each color fades in to 50% (127)
+    schedule = bytearray()
     for color in colors:
-        # Fade in to color
-        for step in range(steps_per_color):
-            brightness = (step / steps_per_color) * 0.5
-            set_color(*color, brightness=brightness)
-            time.sleep(step_time)
+        schedule.extend(memoryview(make_ramp(color, steps_per_color + 1, 127))[:-3])
+    
+    play_ramp(schedule, step_time)
 
 def candle_flicker(color=(255, 147, 41), duration=60.0):
     """
@@ -200,19 +241,25 @@ def candle_flicker(color=(255, 147, 41), duration=60.0):
         color: RGB tuple (default: warm candle orange)
         duration: Duration to run in seconds (default: 60s)
     """
-    import random
-    
-    start_time = time.time()
-    base_brightness = 0.4
-    
-    while time.time() - start_time < duration:
-        # Random flicker
-        variation = random.uniform(-0.15, 0.15)
-        brightness = base_brightness + variation
-        brightness = max(0.2, min(0.6, brightness))  # Clamp
+    _ticks = time.ticks_ms
+    _diff = time.ticks_diff
+    _sleep = time.sleep
+    _randint = random.randint
+    _uniform = random.uniform
+    _set = set_level
+    r, g, b = color
+    
+    duration_ms = int(duration * 1000)
+    start = _ticks()
+    base_level = 51  # 40% of LEVEL_MAX
+    
+    while _diff(_ticks(), start) < duration_ms:
+        # Random flicker of +/-15%
+        level = base_level + _randint(-19, 19)
+        level = max(25, min(76, level))  # Clamp to 20-60%
         
-        set_color(*color, brightness=brightness)
-        time.sleep(random.uniform(0.05, 0.15))
+        _set(r, g, b, level)
+        _sleep(_uniform(0.05, 0.15))
 
 def chakra_sequence(cycles=2, hold_time=15.0):
     """
@@ -232,38 +279,36 @@ def chakra_sequence(cycles=2, hold_time=15.0):
         ("Crown", (148, 0, 211)),     # Violet
     ]
     
+    # Gentle fades peak at 60% = 153/255
+    ramps = [(name, make_ramp(color, 31, 153)) for name, color in chakras]
+    
     for _ in range(cycles):
-        for name, color in chakras:
+        for name, ramp in ramps:
             print(f"[Chakra] {name}")
             
             # Gentle fade in
-            for i in range(30):
-                brightness = (i / 30) * 0.6
-                set_color(*color, brightness=brightness)
-                time.sleep(0.1)
+            _play_fade(ramp, 0.1)
             
             # Hold
             time.sleep(hold_time - 6)  # Account for fade times
             
             # Gentle fade out
-            for i in range(30, -1, -1):
-                brightness = (i / 30) * 0.6
-                set_color(*color, brightness=brightness)
-                time.sleep(0.1)
+            _play_fade(ramp, 0.1, True)
             
             time.sleep(1)  # Brief pause between chakras
 
 # --- Preset Calming Patterns ---
 
+# name -> (pattern function, positional args)
 CALM_PRESETS = {
-    "slow_breath": lambda: slow_breath((200, 180, 255), cycles=10),
-    "deep_breath": lambda: deep_breath((100, 150, 255), hold_time=2.0),
-    "ocean": lambda: ocean_waves(cycles=15),
-    "forest": lambda: forest_ambiance(duration=120),
-    "sunset": lambda: sunset_fade(duration=180),
-    "candle": lambda: candle_flicker(duration=60),
-    "chakras": lambda: chakra_sequence(cycles=1, hold_time=15),
-    "sine_breath": lambda: sinusoidal_breath((255, 200, 150), duration=8, cycles=10),
+    "slow_breath": (slow_breath, ((200, 180, 255), 10)),           # 10 cycles
+    "deep_breath": (deep_breath, ((100, 150, 255), 2.0)),          # 2s hold
+    "ocean": (ocean_waves, (15,)),                                 # 15 cycles
+    "forest": (forest_ambiance, (120,)),                           # 120s
+    "sunset": (sunset_fade, (180,)),                               # 180s
+    "candle": (candle_flicker, ((255, 147, 41), 60)),              # 60s
+    "chakras": (chakra_sequence, (1, 15)),                         # 1 cycle, 15s hold
+    "sine_breath": (sinusoidal_breath, ((255, 200, 150), 8, 10)),  # 8s breath, 10 cycles
 }
 
 def start_calm_session(pattern_name, duration_minutes=5):
@@ -275,17 +320,16 @@ def start_calm_session(pattern_name, duration_minutes=5):
         duration_minutes: How long to run (default: 5 minutes)
     """
     print(f"[Calm Session] Starting: {pattern_name} for {duration_minutes} min")
+    preset = CALM_PRESETS.get(pattern_name)
     
     if pattern_name == "gentle_pulse":
-        # Special case: runs indefinitely, needs timer
-        start_time = time.time()
-        duration_seconds = duration_minutes * 60
-        
-        while time.time() - start_time < duration_seconds:
-            gentle_pulse((200, 150, 255), speed=0.12)
+        # Special case: runs indefinitely, so budget whole pulses instead
+        pulses = max(1, int(duration_minutes * 60 / (41 * 0.12)))
+        gentle_pulse((200, 150, 255), speed=0.12, max_cycles=pulses)
     
-    elif pattern_name in CALM_PRESETS:
-        CALM_PRESETS[pattern_name]()
+    elif preset is not None:
+        func, args = preset
+        func(*args)
     
     else:
         print(f"[Error] Unknown pattern: {pattern_name}")
@@ -294,7 +338,7 @@ def start_calm_session(pattern_name, duration_minutes=5):
     # Gentle fade to off
     print("[Calm Session] Complete - fading out...")
     for i in range(30, -1, -1):
-        set_color(100, 100, 150, brightness=(i/30) * 0.3)
+        set_level(100, 100, 150, (i * 38) // 30)  # 30% down to off
         time.sleep(0.1)
     
     set_color(0, 0, 0, 0)
@@ -1,14 +1,22 @@
 # Visual Light Orb - Desktop Companion
 # Author: Daphne Castellow | MIT License
-# Run:  pip install pygame
+# Run:  pip install pygame  (optional: pip install numba)
 # Start this file first, then send JSON messages to UDP port 5005
 
 import pygame
 import math
 import json
+import select
 import socket
 import time
 
+# Per-frame math is JIT-compiled when Numba is installed; plain Python otherwise
+try:
+    from numba import njit
+except ImportError:
+    def njit(**kwargs):
+        return lambda f: f
+
 # --- Configuration Toggle ---
 RIPPLE_MATCH_HUE = True   # True = ripple uses orb color, False = white shimmer
 WINDOW_SIZE = 600
@@ -21,6 +29,31 @@ screen = pygame.display.set_mode((WINDOW_SIZE, WINDOW_SIZE))
 pygame.display.set_caption("Daph Core Light Orb")
 clock = pygame.time.Clock()
 
+# Ripple layer is allocated once; each frame only clears the last ring's bounds
+ripple_surface = pygame.Surface((WINDOW_SIZE, WINDOW_SIZE), pygame.SRCALPHA)
+ripple_rect = None
+
+# Only the orb's bounding box is repainted while it is just pulsing
+ORB_RECT = pygame.Rect(0, 0, 2 * ORB_RADIUS, 2 * ORB_RADIUS).inflate(2, 2)
+ORB_RECT.center = (WINDOW_SIZE // 2, WINDOW_SIZE // 2)
+drawn_frame = None  # (state, brightness level, base color) last drawn
+
+# One period of sin() in 1024 steps, indexed by int(x * SINE_SCALE) & 1023
+SINE_TABLE = tuple(math.sin(2 * math.pi * i / 1024) for i in range(1024))
+SINE_SCALE = 1024 / (2 * math.pi)
+
+# Orb gradients are rendered once per base color, then tinted per frame
+orb_cache = {}
+orb_scratch = pygame.Surface(ORB_RECT.size, pygame.SRCALPHA)
+
+# Two-color gradients (like Liora) are blended once into 32 integer steps
+gradient_cache = {}
+
+# Fonts are built once; the state label is rendered once per state
+FONT_LABEL = pygame.font.Font(None, 36)
+FONT_LOG = pygame.font.Font(None, 20)
+label_cache = {}
+
 # --- Operator Color Definitions ---
 COLORS = {
     "Emberwake":   (255,  69,   0),   # red-orange
@@ -39,83 +72,141 @@ COLORS = {
 state = "Mendry"
 pulse_t = 0
 ripple_t = None   # timestamp of last message received
-message_log = []  # store recent messages
+message_log = []  # store recent messages as (text, rendered surface)
 
 # --- UDP Listener Setup ---
 sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 65536)  # absorb bursts
 sock.bind(("0.0.0.0", UDP_PORT))
 sock.setblocking(False)
 print(f"[Light Orb] Listening on UDP port {UDP_PORT}")
 print(f"[Light Orb] Send messages like: {{'state': 'Bytey'}}")
 print(f"[Light Orb] Available states: {', '.join(COLORS.keys())}")
 
-def blend(c1, c2, t):
-    """Blend between two RGB colors."""
-    return tuple(int(c1[i] + (c2[i] - c1[i]) * t) for i in range(3))
+def gradient_steps(gradient):
+    """Return the 32 integer blends across a two-color gradient, built once."""
+    steps = gradient_cache.get(gradient)
+    if steps is None:
+        (r0, g0, b0), (r1, g1, b1) = gradient
+        dr, dg, db = r1 - r0, g1 - g0, b1 - b0
+        steps = [(r0 + (dr * p) // 31, g0 + (dg * p) // 31, b0 + (db * p) // 31)
+                 for p in range(32)]
+        gradient_cache[gradient] = steps
+    return steps
+
+def orb_surface(base_color):
+    """Return the orb and its inner glow rendered at full brightness."""
+    surf = orb_cache.get(base_color)
+    if surf is None:
+        surf = pygame.Surface(ORB_RECT.size, pygame.SRCALPHA)
+        center = (ORB_RECT.width // 2, ORB_RECT.height // 2)
+        pygame.draw.circle(surf, base_color, center, ORB_RADIUS)
+        # Inner glow: two smaller, dimmer rings (80% and 60%)
+        for i in range(1, 3):
+            glow_color = tuple(int((1.0 - i * 0.2) * v) for v in base_color)
+            pygame.draw.circle(surf, glow_color, center, ORB_RADIUS - (i * 20))
+        orb_cache[base_color] = surf
+    return surf
+
+@njit(cache=True)
+def _frame_math(t, ripple_age):
+    """
+    All per-frame numbers in one call (one JIT entry point per frame).
+    
+    Args:
+        t: Pulse time in seconds
+        ripple_age: Seconds since the last message, or -1.0 for none
+    
+    Returns (brightness level 0-63, gradient phase 0-31, ripple radius,
+    ripple alpha); radius is 0 when no ripple is showing.
+    """
+    level = int((0.5 + 0.5 * SINE_TABLE[int(t * 2 * SINE_SCALE) & 1023]) * 63 + 0.5)
+    phase = int((0.5 + 0.5 * SINE_TABLE[int(t * SINE_SCALE) & 1023]) * 31 + 0.5)
+    if 0.0 <= ripple_age < 1.0:
+        return level, phase, ORB_RADIUS + int(ripple_age * 200), max(0, 255 - int(ripple_age * 255))
+    return level, phase, 0, 0
 
 def draw_light(color, t, ripple):
-    """Draw the main light orb with pulse and ripple effects."""
-    # Background
-    screen.fill((10, 10, 25))
+    """
+    Draw the light orb with pulse and ripple effects.
+    
+    Returns the screen rects that changed, or an empty list when the
+    frame would look the same as the last one drawn.
+    """
+    global ripple_rect, drawn_frame
+    circle = pygame.draw.circle
+    blit = screen.blit
     
-    # Pulse brightness calculation
-    brightness = 0.5 + 0.5 * math.sin(t * 2)
+    # Pulse brightness is quantized to 64 levels so idle frames can be skipped
+    age = time.time() - ripple if ripple is not None else -1.0
+    level, phase, radius, alpha = _frame_math(t, age)
+    brightness = level / 63
+    rippling = radius > 0
     
     # Handle gradient colors (like Liora)
     if isinstance(color, tuple) and len(color) == 2:
-        # Gradient between two colors
-        phase = 0.5 + 0.5 * math.sin(t)
-        base_color = blend(color[0], color[1], phase)
+        # Gradient between two colors, quantized to 32 cached phases
+        base_color = gradient_steps(color)[phase]
     else:
         base_color = color
     
+    frame = (state, level, base_color)
+    if frame == drawn_frame and not rippling and ripple_rect is None:
+        return []
+    
+    # Ripples, label and log changes repaint everything; pulses only the orb
+    full = rippling or ripple_rect is not None or drawn_frame is None or state != drawn_frame[0]
+    drawn_frame = frame
+    
+    # Background
+    if full:
+        screen.fill((10, 10, 25))
+    else:
+        screen.fill((10, 10, 25), ORB_RECT)
+    
     # Apply brightness
     c = tuple(int(brightness * v) for v in base_color)
     
-    # Draw main orb
-    center = (WINDOW_SIZE // 2, WINDOW_SIZE // 2)
-    pygame.draw.circle(screen, c, center, ORB_RADIUS)
+    # Draw the cached orb and glow, dimmed to the pulse brightness
+    v = int(brightness * 255)
+    orb_scratch.fill((0, 0, 0, 0))
+    orb_scratch.blit(orb_surface(base_color), (0, 0))
+    orb_scratch.fill((v, v, v), special_flags=pygame.BLEND_RGB_MULT)
+    blit(orb_scratch, ORB_RECT)
     
-    # Draw inner glow
-    for i in range(3):
-        glow_radius = ORB_RADIUS - (i * 20)
-        glow_brightness = brightness * (1.0 - i * 0.2)
-        glow_color = tuple(int(glow_brightness * v) for v in base_color)
-        pygame.draw.circle(screen, glow_color, center, glow_radius)
+    if not full:
+        return [ORB_RECT]
     
     # Draw ripple effect on message receive
-    if ripple is not None:
-        age = time.time() - ripple
-        if age < 1.0:
-            radius = ORB_RADIUS + int(age * 200)
-            alpha = max(0, 255 - int(age * 255))
-            ripple_surface = pygame.Surface((WINDOW_SIZE, WINDOW_SIZE), pygame.SRCALPHA)
-            
-            # Choose ripple color
-            if RIPPLE_MATCH_HUE:
-                rc = (*c, alpha)
-            else:
-                rc = (255, 255, 255, alpha)
-            
-            pygame.draw.circle(ripple_surface, rc, center, radius, width=3)
-            screen.blit(ripple_surface, (0, 0))
+    if ripple_rect is not None:
+        ripple_surface.fill((0, 0, 0, 0), ripple_rect)
+        ripple_rect = None
+    if rippling:
+        # Choose ripple color
+        if RIPPLE_MATCH_HUE:
+            rc = (*c, alpha)
+        else:
+            rc = (255, 255, 255, alpha)
+        
+        center = (WINDOW_SIZE // 2, WINDOW_SIZE // 2)
+        ripple_rect = circle(ripple_surface, rc, center, radius, width=3)
+        blit(ripple_surface, ripple_rect, ripple_rect)
     
     # Draw state label
-    font = pygame.font.Font(None, 36)
-    text = font.render(state, True, (255, 255, 255))
-    text_rect = text.get_rect(center=(WINDOW_SIZE // 2, WINDOW_SIZE - 30))
-    screen.blit(text, text_rect)
+    label = label_cache.get(state)
+    if label is None:
+        text = FONT_LABEL.render(state, True, (255, 255, 255))
+        label = (text, text.get_rect(center=(WINDOW_SIZE // 2, WINDOW_SIZE - 30)))
+        label_cache[state] = label
+    blit(*label)
     
     # Draw message log
-    if message_log:
-        log_font = pygame.font.Font(None, 20)
-        y_offset = 10
-        for msg in message_log[-5:]:  # Show last 5 messages
-            log_text = log_font.render(msg, True, (150, 150, 150))
-            screen.blit(log_text, (10, y_offset))
-            y_offset += 25
+    y_offset = 10
+    for _, log_text in message_log[-5:]:  # Show last 5 messages
+        blit(log_text, (10, y_offset))
+        y_offset += 25
     
-    pygame.display.flip()
+    return [screen.get_rect()]
 
 # --- Main Loop ---
 running = True
@@ -129,30 +220,39 @@ while running:
             if event.key == pygame.K_ESCAPE:
                 running = False
     
-    # Receive and parse UDP messages
-    try:
-        data, addr = sock.recvfrom(1024)
-        msg = json.loads(data.decode())
+    # Drain all pending UDP messages; only the latest valid state is shown
+    latest = None
+    while select.select([sock], [], [], 0)[0]:
+        try:
+            data, addr = sock.recvfrom(1024)
+            msg = json.loads(data.decode())
+            
+            if "state" in msg and msg["state"] in COLORS:
+                latest = (msg, addr)
+            else:
+                print(f"[Light Orb] Invalid state: {msg.get('state', 'unknown')}")
         
-        if "state" in msg and msg["state"] in COLORS:
-            state = msg["state"]
-            ripple_t = time.time()
-            log_entry = f"[{time.strftime('%H:%M:%S')}] {state}"
-            message_log.append(log_entry)
-            print(f"[Light Orb] Received: {msg} from {addr}")
-        else:
-            print(f"[Light Orb] Invalid state: {msg.get('state', 'unknown')}")
+        except BlockingIOError:
+            break  # No data available
+        except json.JSONDecodeError:
+            print("[Light Orb] Invalid JSON received")
+        except Exception as e:
+            print(f"[Light Orb] Error: {e}")
     
-    except BlockingIOError:
-        pass  # No data available
-    except json.JSONDecodeError:
-        print("[Light Orb] Invalid JSON received")
-    except Exception as e:
-        print(f"[Light Orb] Error: {e}")
+    if latest is not None:
+        msg, addr = latest
+        state = msg["state"]
+        ripple_t = time.time()
+        log_entry = f"[{time.strftime('%H:%M:%S')}] {state}"
+        message_log.append((log_entry, FONT_LOG.render(log_entry, True, (150, 150, 150))))
+        del message_log[:-5]  # Only the last 5 are drawn; drop older surfaces
+        print(f"[Light Orb] Received: {msg} from {addr}")
     
     # Update animation
     pulse_t += clock.get_time() / 1000
-    draw_light(COLORS[state], pulse_t, ripple_t)
+    dirty = draw_light(COLORS[state], pulse_t, ripple_t)
+    if dirty:
+        pygame.display.update(dirty)
     clock.tick(60)
 
 sock.close()
@@ -3,22 +3,31 @@
 # Author: Daphne Castellow
 # License: MIT
 
-import time
-import machine
-from neopixel import NeoPixel
+import uasyncio as asyncio
+from led_core import set_color, set_level, show, frame, LEVEL_MAX
 
-# --- Setup ---
-pin = machine.Pin(4, machine.Pin.OUT)
-np = NeoPixel(pin, 1)
+# --- Session Control ---
 
-def set_color(r, g, b, brightness=0.6):
-    """Set NeoPixel color with adjustable brightness."""
-    np[0] = (int(r * brightness), int(g * brightness), int(b * brightness))
-    np.write()
+_stop = asyncio.Event()  # Set by stop_session() to end the running session
+
+def stop_session():
+    """
+    End the running focus session early, from another task or a
+    scheduled button/web handler. Harmless when nothing is running.
+    """
+    _stop.set()
+
+async def _wait(seconds):
+    """Wait up to seconds; return True if stop_session() was called first."""
+    try:
+        await asyncio.wait_for(_stop.wait(), seconds)
+        return True
+    except asyncio.TimeoutError:
+        return False
 
 # --- Core Focus Functions ---
 
-def focus_light(color=(135, 206, 250), duration_minutes=None, brightness=0.6):
+async def focus_light(color=(135, 206, 250), duration_minutes=None, brightness=0.6):
     """
     Hold a steady cool-blue light to support concentration or study.
     
@@ -27,27 +36,32 @@ def focus_light(color=(135, 206, 250), duration_minutes=None, brightness=0.6):
         duration_minutes: Session length in minutes (None = indefinite)
         brightness: Light intensity 0.0-1.0 (default: 0.6)
     """
+    _stop.clear()
     set_color(*color, brightness=brightness)
     
-    if duration_minutes is None:
-        # Indefinite focus mode
-        print("[Focus Mode] Active indefinitely - Press Ctrl+C to stop")
-        try:
-            while True:
-                time.sleep(60)
-        except KeyboardInterrupt:
-            print("\n[Focus Mode] Interrupted - Fading out...")
-            fade_out(color, brightness)
-    else:
-        # Timed session with gentle fade-out at the end
-        total_seconds = int(duration_minutes * 60)
-        print(f"[Focus Mode] Active for {duration_minutes} minutes")
-        time.sleep(total_seconds)
-        
-        print("[Focus Mode] Session complete - Fading out...")
-        fade_out(color, brightness)
+    try:
+        if duration_minutes is None:
+            # Indefinite focus mode
+            print("[Focus Mode] Active indefinitely - stop_session() to stop")
+            await _stop.wait()
+            print("\n[Focus Mode] Stopped - Fading out...")
+        else:
+            # Timed session with gentle fade-out at the end
+            total_seconds = int(duration_minutes * 60)
+            print(f"[Focus Mode] Active for {duration_minutes} minutes")
+            if await _wait(total_seconds):
+                print("[Focus Mode] Stopped early - Fading out...")
+            else:
+                print("[Focus Mode] Session complete - Fading out...")
+    except asyncio.CancelledError:
+        # Fade out, then let the caller see the task was cancelled
+        print("\n[Focus Mode] Cancelled - Fading out...")
+        await fade_out(color, brightness)
+        raise
+    
+    await fade_out(color, brightness)
 
-def pomodoro_session(work_minutes=25, break_minutes=5, cycles=4):
+async def pomodoro_session(work_minutes=25, break_minutes=5, cycles=4):
     """
     Pomodoro technique with visual indicators.
     
@@ -57,40 +71,37 @@ def pomodoro_session(work_minutes=25, break_minutes=5, cycles=4):
         cycles: Number of pomodoro cycles (default: 4)
     """
     print(f"[Pomodoro] Starting {cycles} cycles")
+    _stop.clear()
     
+    # Whole session as phases:
+    # (message, color, brightness, seconds, done message, flash color)
+    phases = []
     for cycle in range(1, cycles + 1):
-        # Work session - steady blue
-        print(f"\n[Pomodoro] Cycle {cycle}/{cycles} - WORK TIME ({work_minutes} min)")
-        set_color(100, 150, 255, brightness=0.6)  # Cool blue
-        time.sleep(work_minutes * 60)
+        # Work session - steady cool blue, green flash when done
+        phases.append((f"\n[Pomodoro] Cycle {cycle}/{cycles} - WORK TIME ({work_minutes} min)",
+                       (100, 150, 255), 0.6, work_minutes * 60,
+                       "[Pomodoro] Work session complete!", (0, 255, 100)))
         
-        # Work complete - brief green flash
-        print(f"[Pomodoro] Work session complete!")
-        flash_complete(color=(0, 255, 100))
-        
-        # Determine break type
+        # Break - warm amber (long after the last cycle), blue flash back to work
         if cycle == cycles:
-            # Long break after last cycle
             break_time = break_minutes * 2
-            print(f"[Pomodoro] LONG BREAK ({break_time} min)")
+            phases.append((f"[Pomodoro] LONG BREAK ({break_time} min)",
+                           (255, 180, 100), 0.4, break_time * 60, None, None))
         else:
-            break_time = break_minutes
-            print(f"[Pomodoro] Short break ({break_time} min)")
-        
-        # Break - warm amber
-        set_color(255, 180, 100, brightness=0.4)
-        time.sleep(break_time * 60)
-        
-        # Break complete - brief blue pulse
-        if cycle < cycles:
-            print(f"[Pomodoro] Break over - Back to work!")
-            flash_complete(color=(100, 150, 255))
+            phases.append((f"[Pomodoro] Short break ({break_minutes} min)",
+                           (255, 180, 100), 0.4, break_minutes * 60,
+                           "[Pomodoro] Break over - Back to work!", (100, 150, 255)))
+    
+    if await _run_phases(phases):
+        print("\n[Pomodoro] Stopped early")
+        set_color(0, 0, 0, 0)
+        return
     
     print("\n[Pomodoro] All cycles complete - Well done!")
-    celebration_sequence()
+    await celebration_sequence()
     set_color(0, 0, 0, 0)
 
-def deep_work_session(duration_minutes=90, warmup_minutes=5):
+async def deep_work_session(duration_minutes=90, warmup_minutes=5):
     """
     Extended deep work session with gradual brightness ramp-up.
     
@@ -99,6 +110,7 @@ def deep_work_session(duration_minutes=90, warmup_minutes=5):
         warmup_minutes: Gradual brightness increase period (default: 5)
     """
     print(f"[Deep Work] Starting {duration_minutes}-minute session")
+    _stop.clear()
     
     # Warm-up phase: gradual brightness increase
     print(f"[Deep Work] Warm-up phase ({warmup_minutes} min)")
@@ -106,20 +118,26 @@ def deep_work_session(duration_minutes=90, warmup_minutes=5):
     for step in range(warmup_steps):
         brightness = 0.2 + (0.5 * (step / warmup_steps))  # 0.2 to 0.7
         set_color(120, 160, 255, brightness=brightness)
-        time.sleep(1)
+        if await _wait(1):
+            print("[Deep Work] Stopped during warm-up - Fading out...")
+            await fade_out((120, 160, 255), brightness)
+            return
     
     # Main work session
     work_time = (duration_minutes - warmup_minutes) * 60
     print(f"[Deep Work] Main session in progress...")
     set_color(120, 160, 255, brightness=0.7)
-    time.sleep(work_time)
+    if await _wait(work_time):
+        print("[Deep Work] Stopped early - Fading out...")
+        await fade_out((120, 160, 255), 0.7)
+        return
     
     # Session complete
     print("[Deep Work] Session complete - Great work!")
-    flash_complete(color=(0, 255, 100), flashes=3)
-    fade_out((120, 160, 255), 0.7)
+    await flash_complete(color=(0, 255, 100), flashes=3)
+    await fade_out((120, 160, 255), 0.7)
 
-def flow_state(color=(100, 180, 255), check_interval_minutes=30):
+async def flow_state(color=(100, 180, 255), check_interval_minutes=30):
     """
     Indefinite focus mode with periodic subtle pulses as time markers.
     
@@ -127,27 +145,34 @@ def flow_state(color=(100, 180, 255), check_interval_minutes=30):
         color: RGB tuple (default: medium blue)
         check_interval_minutes: Minutes between pulses (default: 30)
     """
-    print("[Flow State] Entering flow state - Ctrl+C to exit")
+    print("[Flow State] Entering flow state - stop_session() to exit")
     interval_seconds = check_interval_minutes * 60
+    _stop.clear()
     
+    cycle = 0
     try:
-        cycle = 0
         while True:
             cycle += 1
             print(f"[Flow State] Interval {cycle} ({check_interval_minutes} min)")
             
             # Steady light
             set_color(*color, brightness=0.6)
-            time.sleep(interval_seconds - 3)  # Account for pulse time
+            if await _wait(interval_seconds - 3):  # Account for pulse time
+                break
             
             # Subtle pulse marker
-            gentle_pulse(color, cycles=1)
+            await gentle_pulse(color, cycles=1)
     
-    except KeyboardInterrupt:
-        print(f"\n[Flow State] Exited after {cycle} intervals ({cycle * check_interval_minutes} minutes)")
-        fade_out(color, 0.6)
+    except asyncio.CancelledError:
+        # Fade out, then let the caller see the task was cancelled
+        print(f"\n[Flow State] Cancelled after {cycle} intervals ({cycle * check_interval_minutes} minutes)")
+        await fade_out(color, 0.6)
+        raise
+    
+    print(f"\n[Flow State] Exited after {cycle} intervals ({cycle * check_interval_minutes} minutes)")
+    await fade_out(color, 0.6)
 
-def study_blocks(block_minutes=50, break_minutes=10, blocks=3):
+async def study_blocks(block_minutes=50, break_minutes=10, blocks=3):
     """
     Study block method (longer than Pomodoro, fewer breaks).
     
@@ -157,56 +182,93 @@ def study_blocks(block_minutes=50, break_minutes=10, blocks=3):
         blocks: Number of study blocks (default: 3)
     """
     print(f"[Study Blocks] {blocks} blocks of {block_minutes} minutes")
+    _stop.clear()
     
+    # Whole session as phases:
+    # (message, color, brightness, seconds, done message, flash color)
+    phases = []
     for block in range(1, blocks + 1):
-        # Study block - cool white
-        print(f"\n[Study] Block {block}/{blocks} - STUDY TIME ({block_minutes} min)")
-        set_color(200, 210, 255, brightness=0.65)
-        time.sleep(block_minutes * 60)
-        
-        # Block complete
-        print(f"[Study] Block {block} complete!")
-        flash_complete(color=(100, 255, 150))
+        # Study block - cool white, green flash when done
+        phases.append((f"\n[Study] Block {block}/{blocks} - STUDY TIME ({block_minutes} min)",
+                       (200, 210, 255), 0.65, block_minutes * 60,
+                       f"[Study] Block {block} complete!", (100, 255, 150)))
         
+        # Break time - warm yellow
         if block < blocks:
-            # Break time - warm yellow
-            print(f"[Study] Break time ({break_minutes} min)")
-            set_color(255, 220, 150, brightness=0.4)
-            time.sleep(break_minutes * 60)
-            print(f"[Study] Break over - Next block starting!")
+            phases.append((f"[Study] Break time ({break_minutes} min)",
+                           (255, 220, 150), 0.4, break_minutes * 60,
+                           "[Study] Break over - Next block starting!", None))
+    
+    if await _run_phases(phases):
+        print("\n[Study] Stopped early")
+        set_color(0, 0, 0, 0)
+        return
     
     print("\n[Study] All blocks complete - Excellent work!")
-    celebration_sequence()
+    await celebration_sequence()
     set_color(0, 0, 0, 0)
 
 # --- Helper Functions ---
 
-def fade_out(color, initial_brightness):
+async def _run_phases(phases):
+    """
+    Run a precomputed session schedule.
+    
+    Args:
+        phases: List of (message, color, brightness, seconds, done message,
+            flash color) tuples; each shows color for seconds, then prints
+            the done message and flashes the flash color (each if not None)
+            to mark the end of the phase
+    
+    Returns True if stop_session() ended the schedule early.
+    """
+    for message, color, brightness, seconds, done_message, done_color in phases:
+        print(message)
+        set_color(*color, brightness=brightness)
+        if await _wait(seconds):
+            return True
+        if done_message is not None:
+            print(done_message)
+        if done_color is not None:
+            await flash_complete(color=done_color)
+    return False
+
+async def fade_out(color, initial_brightness):
     """Smooth fade-out sequence."""
-    for i in range(100, -1, -5):
-        set_color(*color, brightness=initial_brightness * i/100)
-        time.sleep(0.1)
+    # All 21 steps are scaled up front; the loop only writes and waits
+    top = int(initial_brightness * LEVEL_MAX)
+    ramp = [frame(color, (top * i) // 100) for i in range(100, -1, -5)]
+    
+    _show = show
+    _sleep = asyncio.sleep
+    for rgb in ramp:
+        _show(rgb)
+        await _sleep(0.1)
     set_color(0, 0, 0, 0)
 
-def flash_complete(color=(0, 255, 100), flashes=2):
+async def flash_complete(color=(0, 255, 100), flashes=2):
     """Brief flash to indicate completion."""
     for _ in range(flashes):
         set_color(*color, brightness=0.8)
-        time.sleep(0.15)
+        await asyncio.sleep(0.15)
         set_color(0, 0, 0, 0)
-        time.sleep(0.15)
+        await asyncio.sleep(0.15)
 
-def gentle_pulse(color, cycles=1):
+# One gentle pulse as levels: 60% up to 78%, then 80% back down to 62%
+_GENTLE_LEVELS = bytes([(i * LEVEL_MAX) // 100 for i in range(60, 80, 2)] +
+                       [(i * LEVEL_MAX) // 100 for i in range(80, 60, -2)])
+
+async def gentle_pulse(color, cycles=1):
     """Subtle pulse without disrupting focus."""
+    r, g, b = color
+    _set = set_level
+    _sleep = asyncio.sleep
     for _ in range(cycles):
-        for i in range(60, 80, 2):
-            set_color(*color, brightness=i/100)
-            time.sleep(0.05)
-        for i in range(80, 60, -2):
-            set_color(*color, brightness=i/100)
-            time.sleep(0.05)
+        for level in _GENTLE_LEVELS:
+            _set(r, g, b, level)
+            await _sleep(0.05)
 
-def celebration_sequence():
+async def celebration_sequence():
     """Brief celebration for completing all sessions."""
     colors = [
         (0, 255, 100),   # Green
@@ -215,39 +277,43 @@ def celebration_sequence():
     ]
     for color in colors:
         set_color(*color, brightness=0.7)
-        time.sleep(0.2)
+        await asyncio.sleep(0.2)
     set_color(0, 0, 0, 0)
 
 # --- Preset Focus Sessions ---
 
+# name -> (session coroutine function, positional args)
+# Run one with asyncio.run(start_focus_session(name))
 FOCUS_PRESETS = {
-    "quick_focus": lambda: focus_light(duration_minutes=15, brightness=0.5),
-    "standard_focus": lambda: focus_light(duration_minutes=25, brightness=0.6),
-    "deep_work": lambda: deep_work_session(duration_minutes=90),
-    "pomodoro": lambda: pomodoro_session(work_minutes=25, break_minutes=5, cycles=4),
-    "study_session": lambda: study_blocks(block_minutes=50, break_minutes=10, blocks=3),
-    "flow_state": lambda: flow_state(check_interval_minutes=30),
+    "quick_focus": (focus_light, ((135, 206, 250), 15, 0.5)),      # 15 min at 50%
+    "standard_focus": (focus_light, ((135, 206, 250), 25, 0.6)),   # 25 min at 60%
+    "deep_work": (deep_work_session, (90,)),                       # 90 min
+    "pomodoro": (pomodoro_session, (25, 5, 4)),                    # work, break, cycles
+    "study_session": (study_blocks, (50, 10, 3)),                  # block, break, blocks
+    "flow_state": (flow_state, ((100, 180, 255), 30)),             # 30 min markers
 }
 
-def start_focus_session(preset_name):
+async def start_focus_session(preset_name):
     """
     Start a preset focus session.
     
     Args:
         preset_name: Name from FOCUS_PRESETS
     """
-    if preset_name in FOCUS_PRESETS:
+    preset = FOCUS_PRESETS.get(preset_name)
+    if preset is not None:
         print(f"\n{'='*50}")
         print(f"Starting: {preset_name}")
         print(f"{'='*50}\n")
-        FOCUS_PRESETS[preset_name]()
+        func, args = preset
+        await func(*args)
     else:
         print(f"[Error] Unknown preset: {preset_name}")
         print(f"Available presets: {', '.join(FOCUS_PRESETS.keys())}")
 
 # --- Demo Mode ---
 
-def demo_focus_modes():
+async def demo_focus_modes():
     """Brief demo of focus modes."""
     print("Focus Mode Demo - Starting...\n")
     
@@ -259,8 +325,8 @@ def demo_focus_modes():
     
     for name, func in demos:
         print(f"Demo: {name}")
-        func()
-        time.sleep(1)
+        await func()
+        await asyncio.sleep(1)
     
     print("\nFocus Mode Demo - Complete")
 
@@ -272,5 +338,9 @@ if __name__ == "__main__":
     print()
     
     # Run demo or specific session
-    # demo_focus_modes()
-    start_focus_session("pomodoro")
+    # asyncio.run(demo_focus_modes())
+    try:
+        asyncio.run(start_focus_session("pomodoro"))
+    finally:
+        # Ctrl+C stops the scheduler, not the session, so switch off here
+        set_color(0, 0, 0, 0)
@@ -0,0 +1,225 @@
+# led_core.py
+# Shared NeoPixel setup and color output for Light Node modes
+# Author: Daphne Castellow
+# License: MIT
+
+import time
+import random
+import machine
+import micropython
+import uasyncio as asyncio
+try:
+    from ws2812_pio import WS2812 as NeoPixel  # RP2040: PIO-driven output
+except ImportError:
+    from neopixel import NeoPixel
+from micropython import const
+
+# --- Setup ---
+LEVEL_MAX = const(127)  # set_level/frame brightness levels run 0-LEVEL_MAX
+np = None            # NeoPixel, created by get_np()
+buf = None           # Raw pixel bytes in WS2812 GRB order
+_px = bytearray(3)   # Next pixel (GRB), compared with buf before writing
+OFF = bytes(3)       # Off frame for show() and blink()
+
+def get_np():
+    """Create the NeoPixel on first use, so importing touches no hardware."""
+    global np, buf
+    if np is None:
+        pin = machine.Pin(4, machine.Pin.OUT)   # adjust pin for your board
+        np = NeoPixel(pin, 1)                   # single RGB LED
+        buf = np.buf
+        # The LED may still be lit from before a reset; write buf's zeros
+        # once so it matches, or show() would skip the first switch-off
+        np.write()
+    return np
+
+def show(px):
+    """Write a GRB pixel to the LED, skipping the write if it is already showing."""
+    if np is None:
+        get_np()
+    if px != buf:
+        buf[0:3] = px
+        np.write()
+
+# --- Color Output ---
+
+@micropython.viper
+def _apply(r: int, g: int, b: int, level: int):
+    """Clamp r, g, b to 0-255 and level to 0-LEVEL_MAX, then scale by level into _px (GRB)."""
+    if r < 0:
+        r = 0
+    elif r > 255:
+        r = 255
+    if g < 0:
+        g = 0
+    elif g > 255:
+        g = 255
+    if b < 0:
+        b = 0
+    elif b > 255:
+        b = 255
+    if level < 0:
+        level = 0
+    elif level > LEVEL_MAX:
+        level = LEVEL_MAX
+    # v * level // 127 as a multiply and shift, exact for v <= 255, level <= 127
+    px = ptr8(_px)
+    px[0] = (g * level * 33027) >> 22
+    px[1] = (r * level * 33027) >> 22
+    px[2] = (b * level * 33027) >> 22
+
+@micropython.viper
+def _scale(r: int, g: int, b: int, b256: int):
+    """Clamp r, g, b to 0-255 and b256 to 0-256, then scale by b256/256 into _px (GRB)."""
+    if r < 0:
+        r = 0
+    elif r > 255:
+        r = 255
+    if g < 0:
+        g = 0
+    elif g > 255:
+        g = 255
+    if b < 0:
+        b = 0
+    elif b > 255:
+        b = 255
+    if b256 < 0:
+        b256 = 0
+    elif b256 > 256:
+        b256 = 256
+    px = ptr8(_px)
+    px[0] = (g * b256) >> 8
+    px[1] = (r * b256) >> 8
+    px[2] = (b * b256) >> 8
+
+# set_color, set_level and set_color_fine inline show(): each update is
+# one Python call plus one viper call
+
+def set_color(r, g, b, brightness=0.5):
+    """Set NeoPixel color with brightness control (0.0-1.0)."""
+    _apply(r, g, b, int(brightness * LEVEL_MAX))
+    if np is None:
+        get_np()
+    if _px != buf:
+        buf[0:3] = _px
+        np.write()
+
+def set_level(r, g, b, level):
+    """Set NeoPixel color at an integer level (0-LEVEL_MAX), for tight loops."""
+    _apply(r, g, b, level)
+    if np is None:
+        get_np()
+    if _px != buf:
+        buf[0:3] = _px
+        np.write()
+
+def set_color_fine(r, g, b, brightness):
+    """
+    Set NeoPixel color with brightness (0.0-1.0) in 1/256 steps.
+    
+    For very dim fades, where set_level's LEVEL_MAX + 1 levels would show as
+    visible steps.
+    """
+    _scale(r, g, b, int(brightness * 256))
+    if np is None:
+        get_np()
+    if _px != buf:
+        buf[0:3] = _px
+        np.write()
+
+def frame(color, level=LEVEL_MAX):
+    """Precompute one GRB frame of color at level (0-LEVEL_MAX) for show()."""
+    _apply(color[0], color[1], color[2], level)
+    return bytes(_px)
+
+# --- Precomputed Ramps ---
+
+def make_ramp(color, n, peak=255):
+    """Precompute n GRB steps from off to color at peak brightness (0-255)."""
+    r, g, b = color
+    div = 255 * (n - 1)
+    ramp = bytearray(3 * n)
+    for i in range(n):
+        k = peak * i
+        ramp[3 * i] = (g * k) // div
+        ramp[3 * i + 1] = (r * k) // div
+        ramp[3 * i + 2] = (b * k) // div
+    return ramp
+
+@micropython.native
+def play_ramp(ramp, step_time, reverse=False):
+    """Copy each precomputed GRB step into the LED buffer, pausing step_time between."""
+    if reverse:
+        steps = range(len(ramp) - 3, -1, -3)
+    else:
+        steps = range(0, len(ramp), 3)
+    _write = get_np().write
+    _buf = buf
+    _sleep = time.sleep
+    for j in steps:
+        _buf[0] = ramp[j]
+        _buf[1] = ramp[j + 1]
+        _buf[2] = ramp[j + 2]
+        _write()
+        _sleep(step_time)
+
+async def sleep_until(deadline):
+    """
+    Sleep until a time.ticks_ms() deadline.
+    
+    Ramps advance one fixed deadline per step (due = ticks_add(due, ms)),
+    so time spent on color math and writes doesn't add up as drift and a
+    20-minute fade takes 20 minutes.
+    """
+    await asyncio.sleep_ms(max(0, time.ticks_diff(deadline, time.ticks_ms())))
+
+async def play_ramp_async(ramp, step_ms, due=None, jitter_ms=0):
+    """
+    Write each GRB step of ramp to the LED, one every step_ms, without blocking.
+    
+    Args:
+        ramp: bytearray of GRB bytes, 3 per step
+        step_ms: Milliseconds per step
+        due: ticks_ms deadline to continue from (default: now)
+        jitter_ms: Vary each step by up to +/- this much (default: 0)
+    
+    Steps that repeat the bytes already showing are not rewritten.
+    Returns the deadline after the last step, for chaining ramps.
+    """
+    if due is None:
+        due = time.ticks_ms()
+    _buf = get_np().buf
+    _write = np.write
+    _add = time.ticks_add
+    _randint = random.randint
+    step = step_ms
+    for j in range(0, len(ramp), 3):
+        g = ramp[j]
+        r = ramp[j + 1]
+        b = ramp[j + 2]
+        if g != _buf[0] or r != _buf[1] or b != _buf[2]:
+            _buf[0] = g
+            _buf[1] = r
+            _buf[2] = b
+            _write()
+        if jitter_ms:
+            step = step_ms + _randint(-jitter_ms, jitter_ms)
+        due = _add(due, step)
+        await sleep_until(due)
+    return due
+
+# --- Flashing ---
+
+@micropython.native
+def blink(on, count, on_time, off_time):
+    """Alternate a precomputed frame (see frame()) with off, count times."""
+    _buf = get_np().buf
+    _write = np.write
+    _sleep = time.sleep
+    for _ in range(count):
+        _buf[0:3] = on
+        _write()
+        _sleep(on_time)
+        _buf[0:3] = OFF
+        _write()
+        _sleep(off_time)
@@ -3,50 +3,47 @@
 # License: MIT
 # Framework: Daph Core – Intention Becomes Presence
 
-import machine
+import math
 import time
-from neopixel import NeoPixel
+from led_core import set_color, set_level, frame, blink, LEVEL_MAX
 import network
 import socket
 import json
 
 # --- Hardware Setup ---
-pin = machine.Pin(4, machine.Pin.OUT)   # adjust pin for your board
-np = NeoPixel(pin, 1)                   # single RGB LED
-
-def set_color(r, g, b, brightness=0.5):
-    """Set LED color with brightness control"""
-    np[0] = (int(r*brightness), int(g*brightness), int(b*brightness))
-    np.write()
+# NeoPixel (pin 4, single RGB LED) and set_color() live in led_core
 
 # --- Basic Patterns ---
+# One pulse as levels: fade in 0-100% and back out in 5% steps
+_PULSE_LEVELS = bytes([(i * LEVEL_MAX) // 100 for i in range(0, 101, 5)] +
+                      [(i * LEVEL_MAX) // 100 for i in range(100, -1, -5)])
+
 def pulse(color, cycles=3, speed=0.05):
     """Pulse pattern for operator state visualization"""
+    r, g, b = color
+    _set = set_level
+    _sleep = time.sleep
     for _ in range(cycles):
-        # Fade in
-        for i in range(0, 101, 5):
-            set_color(*color, i/100)
-            time.sleep(speed)
-        # Fade out
-        for i in range(100, -1, -5):
-            set_color(*color, i/100)
-            time.sleep(speed)
+        for level in _PULSE_LEVELS:
+            _set(r, g, b, level)
+            _sleep(speed)
+
+# One breath as 50 levels: a sine wave from 40% up to 80%, down to 0 and back
+_BREATHE_STEPS = bytes(int((1 + math.sin(i * 2 * math.pi / 50)) / 2 * 0.8 * LEVEL_MAX) for i in range(50))
 
 def breathe(color, duration=2.0):
     """Smooth breathing pattern"""
-    steps = 50
-    for i in range(steps):
-        brightness = (1 + __import__('math').sin(i * 3.14159 * 2 / steps)) / 2
-        set_color(*color, brightness * 0.8)
-        time.sleep(duration / steps)
+    r, g, b = color
+    step_time = duration / len(_BREATHE_STEPS)
+    _set = set_level
+    _sleep = time.sleep
+    for level in _BREATHE_STEPS:
+        _set(r, g, b, level)
+        _sleep(step_time)
 
 def flash(color, count=3, on_time=0.1, off_time=0.1):
     """Quick flash pattern"""
-    for _ in range(count):
-        set_color(*color, 1.0)
-        time.sleep(on_time)
-        set_color(0, 0, 0, 0)
-        time.sleep(off_time)
+    blink(frame(color), count, on_time, off_time)
 
 # --- Operator State Colors ---
 STATES = {
@@ -4,21 +4,56 @@
 # License: MIT
 
 import time
-import machine
-from neopixel import NeoPixel
+import uasyncio as asyncio
+from micropython import const
+from led_core import set_color, set_level, play_ramp_async, LEVEL_MAX
 
 # --- Setup ---
-pin = machine.Pin(4, machine.Pin.OUT)
-np = NeoPixel(pin, 1)
+_DEBUG = const(0)  # 1 = also log every pulse/interval (compiled out when 0)
 
-def set_color(r, g, b, brightness=0.5):
-    """Set LED color with brightness control."""
-    np[0] = (int(r * brightness), int(g * brightness), int(b * brightness))
-    np.write()
+# --- Sunrise Ramps ---
+
+# Each sunrise is linear in progress p (0.0-1.0):
+#   channel = start + p * span (clamped 0-255), brightness = start + e * span
+# where e is p, or p * p for eased (slower start) brightness.
+# kind: (r start, r span, g start, g span, b start, b span,
+#        brightness start, brightness span, eased)
+SUNRISE_COEFFS = {
+    "standard": (120, 135, 0, 180, 0, 120, 0.1, 0.9, False),    # red → orange → yellow → white
+    "gentle": (150, 105, 0, 150, 0, 80, 0.05, 0.95, True),      # warmer, slow start
+    "rapid": (120, 135, 0, 180, 0, 120, 0.2, 0.8, False),       # standard colors, brighter start
+    "arctic": (100, 155, 50, 205, 150, 105, 0.1, 0.9, False),   # purple → pink → cool white
+    "tropical": (255, 0, 0, 200, 100, -100, 0.15, 0.85, False), # deep red → orange → gold
+}
+
+# (kind, steps) -> bytearray of brightness-scaled GRB bytes, 3 per step
+_SUNRISE_CACHE = {}
+
+def _sunrise_ramp(kind, steps):
+    """Precompute (once per kind and length) the steps + 1 colors of a sunrise."""
+    key = (kind, steps)
+    ramp = _SUNRISE_CACHE.get(key)
+    if ramp is None:
+        r0, rs, g0, gs, b0, bs, br0, brs, eased = SUNRISE_COEFFS[kind]
+        ramp = bytearray(3 * (steps + 1))
+        for i in range(steps + 1):
+            # Channels in integer math; only the brightness curve needs floats
+            p = i / steps
+            e = p * p if eased else p
+            level = int(min(1.0, br0 + e * brs) * LEVEL_MAX)  # scaled as set_level does
+            ramp[3 * i] = (max(0, min(255, g0 + (i * gs) // steps)) * level) // LEVEL_MAX
+            ramp[3 * i + 1] = (max(0, min(255, r0 + (i * rs) // steps)) * level) // LEVEL_MAX
+            ramp[3 * i + 2] = (max(0, min(255, b0 + (i * bs) // steps)) * level) // LEVEL_MAX
+        _SUNRISE_CACHE[key] = ramp
+    return ramp
+
+async def _run_sunrise(kind, steps, step_time=5):
+    """Play a SUNRISE_COEFFS sunrise over steps + 1 steps, step_time seconds apart."""
+    await play_ramp_async(_sunrise_ramp(kind, steps), int(step_time * 1000))
 
 # --- Core Sunrise Functions ---
 
-def sunrise_fade(minutes=15):
+async def sunrise_fade(minutes=15):
     """
     Simulate sunrise by brightening from dark red to soft white.
     
@@ -31,23 +66,11 @@ def sunrise_fade(minutes=15):
     print(f"[Sunrise] Starting {minutes}-minute sunrise sequence")
     steps = int(minutes * 12)  # 5-second steps
     
-    for i in range(steps + 1):
-        progress = i / steps
-        
-        # Color ramp: red → orange → yellow → white
-        r = min(255, int(120 + progress * 135))
-        g = min(255, int(progress * 180))
-        b = int(progress * 120)
-        
-        # Brightness ramp
-        brightness = min(1.0, 0.1 + progress * 0.9)
-        
-        set_color(r, g, b, brightness)
-        time.sleep(5)
+    await _run_sunrise("standard", steps)
     
     print("[Sunrise] Sunrise complete - Good morning!")
 
-def gentle_sunrise(minutes=20):
+async def gentle_sunrise(minutes=20):
     """
     Extra gentle sunrise with slower initial phase.
     
@@ -59,24 +82,11 @@ def gentle_sunrise(minutes=20):
     print(f"[Gentle Sunrise] Starting {minutes}-minute gentle sunrise")
     steps = int(minutes * 12)
     
-    for i in range(steps + 1):
-        progress = i / steps
-        
-        # Non-linear brightness curve (slower start)
-        brightness_curve = progress * progress  # Quadratic easing
-        brightness = min(1.0, 0.05 + brightness_curve * 0.95)
-        
-        # Warmer color progression
-        r = min(255, int(150 + progress * 105))
-        g = min(255, int(progress * 150))
-        b = int(progress * 80)
-        
-        set_color(r, g, b, brightness)
-        time.sleep(5)
+    await _run_sunrise("gentle", steps)
     
     print("[Gentle Sunrise] Sunrise complete")
 
-def rapid_sunrise(minutes=5):
+async def rapid_sunrise(minutes=5):
     """
     Quick sunrise for those who need faster wake-up.
     
@@ -88,23 +98,11 @@ def rapid_sunrise(minutes=5):
     print(f"[Rapid Sunrise] Starting {minutes}-minute rapid sunrise")
     steps = int(minutes * 12)
     
-    for i in range(steps + 1):
-        progress = i / steps
-        
-        # Linear brightness
-        brightness = 0.2 + progress * 0.8
-        
-        # Standard sunrise colors
-        r = min(255, int(120 + progress * 135))
-        g = min(255, int(progress * 180))
-        b = int(progress * 120)
-        
-        set_color(r, g, b, brightness)
-        time.sleep(5)
+    await _run_sunrise("rapid", steps)
     
     print("[Rapid Sunrise] Sunrise complete")
 
-def arctic_sunrise(minutes=18):
+async def arctic_sunrise(minutes=18):
     """
     Cool-toned sunrise inspired by arctic dawn.
     
@@ -116,23 +114,11 @@ def arctic_sunrise(minutes=18):
     print(f"[Arctic Sunrise] Starting {minutes}-minute arctic sunrise")
     steps = int(minutes * 12)
     
-    for i in range(steps + 1):
-        progress = i / steps
-        
-        # Arctic color progression: purple → pink → cool white
-        r = min(255, int(100 + progress * 155))
-        g = min(255, int(50 + progress * 205))
-        b = min(255, int(150 + progress * 105))
-        
-        # Gentle brightness curve
-        brightness = 0.1 + progress * 0.9
-        
-        set_color(r, g, b, brightness)
-        time.sleep(5)
+    await _run_sunrise("arctic", steps)
     
     print("[Arctic Sunrise] Sunrise complete")
 
-def tropical_sunrise(minutes=15):
+async def tropical_sunrise(minutes=15):
     """
     Vibrant sunrise inspired by tropical dawn.
     
@@ -144,23 +130,11 @@ def tropical_sunrise(minutes=15):
     print(f"[Tropical Sunrise] Starting {minutes}-minute tropical sunrise")
     steps = int(minutes * 12)
     
-    for i in range(steps + 1):
-        progress = i / steps
-        
-        # Vibrant tropical colors
-        r = 255
-        g = min(255, int(progress * 200))
-        b = max(0, int(100 - progress * 100))
-        
-        # Dynamic brightness
-        brightness = 0.15 + progress * 0.85
-        
-        set_color(r, g, b, brightness)
-        time.sleep(5)
+    await _run_sunrise("tropical", steps)
     
     print("[Tropical Sunrise] Sunrise complete")
 
-def dawn_simulator(wake_time_minutes=30, hold_time_minutes=5):
+async def dawn_simulator(wake_time_minutes=30, hold_time_minutes=5):
     """
     Complete dawn simulation with pre-wake and post-wake phases.
     
@@ -179,20 +153,20 @@ def dawn_simulator(wake_time_minutes=30, hold_time_minutes=5):
     print("[Dawn] Phase 1: Deep sleep preservation")
     for _ in range(60):  # 5 minutes in 5-second steps
         set_color(80, 0, 0, brightness=0.05)
-        time.sleep(5)
+        await asyncio.sleep(5)
     
     # Phase 2: Sunrise
     print(f"[Dawn] Phase 2: Sunrise ({wake_time_minutes} minutes)")
-    sunrise_fade(minutes=wake_time_minutes)
+    await sunrise_fade(minutes=wake_time_minutes)
     
     # Phase 3: Wake phase (hold bright)
     print(f"[Dawn] Phase 3: Wake phase ({hold_time_minutes} minutes)")
     set_color(255, 220, 180, brightness=1.0)
-    time.sleep(hold_time_minutes * 60)
+    await asyncio.sleep(hold_time_minutes * 60)
     
     print("[Dawn] Dawn simulation complete - Time to start your day!")
 
-def energy_boost():
+async def energy_boost():
     """
     Bright, energizing sequence for already-awake mornings.
     Quick transition to bright cool white.
@@ -210,12 +184,15 @@ def energy_boost():
         b = int(255)
         
         set_color(r, g, b, brightness)
-        time.sleep(1)
+        await asyncio.sleep(1)
     
     print("[Energy Boost] Ready for the day!")
-    time.sleep(30)  # Hold for 30 seconds
+    await asyncio.sleep(30)  # Hold for 30 seconds
+
+# One alarm pulse in tenths of its peak: up 0-9, then down 10-1
+_ALARM_TRIANGLE = bytes(list(range(10)) + list(range(10, 0, -1)))
 
-def progressive_alarm(alarm_minutes=10, pulse_interval_seconds=30):
+async def progressive_alarm(alarm_minutes=10, pulse_interval_seconds=30):
     """
     Progressive alarm that pulses with increasing intensity.
     
@@ -227,34 +204,36 @@ def progressive_alarm(alarm_minutes=10, pulse_interval_seconds=30):
     """
     print(f"[Progressive Alarm] Starting {alarm_minutes}-minute alarm")
     
-    total_seconds = alarm_minutes * 60
+    total_ms = int(alarm_minutes * 60000)
+    start = time.ticks_ms()
+    next_pulse = start
     elapsed = 0
     pulse_count = 0
+    _set = set_level
+    _sleep = asyncio.sleep
     
-    while elapsed < total_seconds:
+    while elapsed < total_ms:
         pulse_count += 1
-        progress = elapsed / total_seconds
+        progress = elapsed / total_ms
         
         # Increasing brightness for each pulse
         max_brightness = 0.3 + progress * 0.7
         
-        # Pulse effect
-        for i in range(10):
-            brightness = (i / 10) * max_brightness
-            set_color(255, 100, 0, brightness)
-            time.sleep(0.1)
+        # Pulse effect: orange at (t / 10) * max_brightness, as a level
+        scale = max_brightness * LEVEL_MAX / 10
+        for t in _ALARM_TRIANGLE:
+            _set(255, 100, 0, int(t * scale))
+            await _sleep(0.1)
         
-        for i in range(10, 0, -1):
-            brightness = (i / 10) * max_brightness
-            set_color(255, 100, 0, brightness)
-            time.sleep(0.1)
-        
-        # Wait before next pulse (decreasing interval)
+        # Wait before next pulse (decreasing interval), measured from this
+        # pulse's start so time spent pulsing doesn't accumulate as drift
         wait_time = max(5, pulse_interval_seconds * (1 - progress))
-        time.sleep(wait_time)
-        elapsed += 2 + wait_time  # 2 seconds for pulse + wait time
+        next_pulse = time.ticks_add(next_pulse, int((2 + wait_time) * 1000))
+        await asyncio.sleep_ms(max(0, time.ticks_diff(next_pulse, time.ticks_ms())))
+        elapsed = time.ticks_diff(time.ticks_ms(), start)
         
-        print(f"[Progressive Alarm] Pulse {pulse_count} - {int(progress*100)}% intensity")
+        if _DEBUG:
+            print(f"[Progressive Alarm] Pulse {pulse_count} - {int(progress*100)}% intensity")
     
     # Final state: steady bright
     set_color(255, 200, 150, brightness=1.0)
@@ -262,69 +241,66 @@ def progressive_alarm(alarm_minutes=10, pulse_interval_seconds=30):
 
 # --- Preset Morning Modes ---
 
+# name -> (wake-up coroutine function, positional args)
+# Run one with asyncio.run(start_morning_mode(name))
 MORNING_PRESETS = {
-    "standard_sunrise": lambda: sunrise_fade(minutes=15),
-    "gentle_sunrise": lambda: gentle_sunrise(minutes=20),
-    "rapid_sunrise": lambda: rapid_sunrise(minutes=5),
-    "arctic_sunrise": lambda: arctic_sunrise(minutes=18),
-    "tropical_sunrise": lambda: tropical_sunrise(minutes=15),
-    "full_dawn": lambda: dawn_simulator(wake_time_minutes=30, hold_time_minutes=5),
-    "energy_boost": lambda: energy_boost(),
-    "progressive_alarm": lambda: progressive_alarm(alarm_minutes=10),
+    "standard_sunrise": (sunrise_fade, (15,)),          # minutes
+    "gentle_sunrise": (gentle_sunrise, (20,)),
+    "rapid_sunrise": (rapid_sunrise, (5,)),
+    "arctic_sunrise": (arctic_sunrise, (18,)),
+    "tropical_sunrise": (tropical_sunrise, (15,)),
+    "full_dawn": (dawn_simulator, (30, 5)),             # sunrise, hold minutes
+    "energy_boost": (energy_boost, ()),
+    "progressive_alarm": (progressive_alarm, (10,)),    # alarm minutes
 }
 
-def start_morning_mode(preset_name):
+async def start_morning_mode(preset_name):
     """
     Start a preset morning wake-up sequence.
     
     Args:
         preset_name: Name from MORNING_PRESETS
     """
-    if preset_name in MORNING_PRESETS:
+    preset = MORNING_PRESETS.get(preset_name)
+    if preset is not None:
         print(f"\n{'='*50}")
         print(f"Morning Mode: {preset_name}")
         print(f"{'='*50}\n")
-        MORNING_PRESETS[preset_name]()
+        func, args = preset
+        await func(*args)
     else:
         print(f"[Error] Unknown preset: {preset_name}")
         print(f"Available presets: {', '.join(MORNING_PRESETS.keys())}")
 
 # --- Helper Functions ---
 
-def test_sunrise(seconds=30):
+async def test_sunrise(seconds=30):
     """Quick test of sunrise effect (30 seconds)."""
     print("[Test] Running 30-second sunrise test")
     steps = 30
     
-    for i in range(steps + 1):
-        progress = i / steps
-        r = min(255, int(120 + progress * 135))
-        g = min(255, int(progress * 180))
-        b = int(progress * 120)
-        brightness = 0.1 + progress * 0.9
-        
-        set_color(r, g, b, brightness)
-        time.sleep(1)
+    await _run_sunrise("standard", steps, 1)
     
     print("[Test] Test complete")
 
-def fade_to_off(duration_seconds=10):
+async def fade_to_off(duration_seconds=10):
     """Gentle fade to off."""
     print("[Fade] Fading to off...")
     steps = duration_seconds
     
     # Get current color (approximation)
+    _set = set_level
+    _sleep = asyncio.sleep
     for i in range(steps, -1, -1):
-        brightness = i / steps
-        set_color(255, 220, 180, brightness)
-        time.sleep(1)
+        _set(255, 220, 180, (LEVEL_MAX * i) // steps)
+        await _sleep(1)
     
     set_color(0, 0, 0, 0)
     print("[Fade] Off")
 
 # --- Scheduler Integration ---
 
-def schedule_sunrise(wake_hour, wake_minute, sunrise_minutes=15):
+async def schedule_sunrise(wake_hour, wake_minute, sunrise_minutes=15):
     """
     Schedule sunrise to complete at specified wake time.
     
@@ -334,40 +310,27 @@ def schedule_sunrise(wake_hour, wake_minute, sunrise_minutes=15):
         sunrise_minutes: Duration of sunrise (default: 15)
     
     Note: Requires continuous running. Consider using RTC and deep sleep
-    for production use.
+    for production use. Run it as an asyncio task so other tasks (sensors,
+    network) keep running while it waits.
     """
-    import time
+    # Start time (sunrise_minutes before wake time) as seconds past midnight
+    start_seconds = (wake_hour * 3600 + wake_minute * 60 - int(sunrise_minutes * 60)) % 86400
     
     while True:
         current_time = time.localtime()
-        current_hour = current_time[3]
-        current_minute = current_time[4]
-        
-        # Calculate start time (sunrise_minutes before wake time)
-        start_hour = wake_hour
-        start_minute = wake_minute - sunrise_minutes
-        
-        if start_minute < 0:
-            start_minute += 60
-            start_hour -= 1
-        
-        if start_hour < 0:
-            start_hour += 24
+        current_seconds = current_time[3] * 3600 + current_time[4] * 60 + current_time[5]
         
-        # Check if it's time to start
-        if current_hour == start_hour and current_minute == start_minute:
-            print(f"[Scheduler] Starting sunrise for {wake_hour:02d}:{wake_minute:02d} wake time")
-            sunrise_fade(minutes=sunrise_minutes)
-            
-            # Sleep until next day to avoid re-triggering
-            time.sleep(86400)  # 24 hours
+        # Sleep straight through to the next start (today or tomorrow)
+        wait = (start_seconds - current_seconds) % 86400
+        print(f"[Scheduler] Next sunrise starts in {wait // 60} min")
+        await asyncio.sleep(wait)
         
-        # Check every minute
-        time.sleep(60)
+        print(f"[Scheduler] Starting sunrise for {wake_hour:02d}:{wake_minute:02d} wake time")
+        await sunrise_fade(minutes=sunrise_minutes)
 
 # --- Demo Mode ---
 
-def demo_morning_modes():
+async def demo_morning_modes():
     """Quick demo of various sunrise modes."""
     print("Morning Mode Demo - Starting...\n")
     
@@ -379,10 +342,10 @@ def demo_morning_modes():
     
     for name, func in demos:
         print(f"Demo: {name}")
-        func()
-        time.sleep(2)
-        fade_to_off(duration_seconds=3)
-        time.sleep(1)
+        await func()
+        await asyncio.sleep(2)
+        await fade_to_off(duration_seconds=3)
+        await asyncio.sleep(1)
     
     print("\nMorning Mode Demo - Complete")
 
@@ -394,5 +357,5 @@ if __name__ == "__main__":
     print()
     
     # Run demo or specific mode
-    # demo_morning_modes()
-    start_morning_mode("standard_sunrise")
+    # asyncio.run(demo_morning_modes())
+    asyncio.run(start_morning_mode("standard_sunrise"))
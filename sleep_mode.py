@@ -4,21 +4,74 @@
 # License: MIT
 
 import time
-import machine
-from neopixel import NeoPixel
+import math
+import random
+import uasyncio as asyncio
+from led_core import set_color_fine, play_ramp_async
 
 # --- Setup ---
-pin = machine.Pin(4, machine.Pin.OUT)
-np = NeoPixel(pin, 1)
+# NeoPixel (pin 4, single RGB LED) lives in led_core
 
 def set_color(r, g, b, brightness=0.3):
-    """Set NeoPixel color with adjustable brightness."""
-    np[0] = (int(r * brightness), int(g * brightness), int(b * brightness))
-    np.write()
+    """Set NeoPixel color with adjustable brightness, skipping unchanged writes."""
+    # 1/256 brightness steps: bedtime fades spend a long time very dim
+    set_color_fine(r, g, b, brightness)
+
+# --- Precomputed Fades ---
+
+# One breath for breathe_to_sleep: 40 steps of a half sine, 0 up to 1 and back
+_BREATH = tuple(math.sin(math.pi * i / 40) for i in range(40))
+
+def _shade_into(ramp, shade, levels):
+    """
+    Store shade(level) for each of levels as consecutive GRB steps of ramp.
+    
+    shade returns (r, g, b, brightness). Every sleep_mode ramp is built
+    here, scaling as set_color does (brightness in 1/256 steps) inline,
+    so the loop makes no call per step beyond shade itself.
+    """
+    o = 0
+    for level in levels:
+        r, g, b, brightness = shade(level)
+        b256 = int(brightness * 256)
+        ramp[o] = (g * b256) >> 8
+        ramp[o + 1] = (r * b256) >> 8
+        ramp[o + 2] = (b * b256) >> 8
+        o += 3
+    return ramp
+
+def _shade_ramp(steps, shade):
+    """
+    Precompute a fade as level falls from 1.0 to 0.0 over steps + 1 steps.
+    
+    Args:
+        steps: Number of steps after the first
+        shade: Function of level returning (r, g, b, brightness)
+    """
+    if steps < 1:
+        steps = 1  # Sub-5 s fades: just level 1.0 and 0.0
+    return _shade_into(bytearray(3 * (steps + 1)), shade,
+                       [i / steps for i in range(steps, -1, -1)])
+
+def _fade_ramp(color, brightness, steps):
+    """Precompute a linear fade of color from brightness down to off."""
+    r, g, b = color
+    return _shade_ramp(steps, lambda level: (r, g, b, brightness * level))
+
+# --- Fade Shades ---
+# shade(level) -> (r, g, b, brightness) for _shade_ramp, level 1.0 → 0.0
+
+def _sunset_shade(level):
+    """Orange → amber → deep red; green fades fastest."""
+    return int(255 * level), int(160 * level * level), int(30 * level), 0.4 * level
+
+def _campfire_shade(level):
+    """Warm campfire colors, dimming with a random 85-100% flicker."""
+    return 255, int(100 + 60 * level), int(20 * level), 0.35 * level * random.uniform(0.85, 1.0)
 
 # --- Core Sleep Functions ---
 
-def sleep_fade(color=(255, 160, 80), minutes=20):
+async def sleep_fade(color=(255, 160, 80), minutes=20):
     """
     Warm amber light that fades slowly to darkness.
     
@@ -31,16 +84,13 @@ def sleep_fade(color=(255, 160, 80), minutes=20):
     print(f"[Sleep Mode] Starting {minutes}-minute fade to sleep")
     steps = int(minutes * 12)  # 12 steps per minute
     
-    for i in range(steps, -1, -1):
-        level = i / steps
-        set_color(*color, brightness=0.3 * level)
-        time.sleep(5)
+    await play_ramp_async(_fade_ramp(color, 0.3, steps), 5000)
     
     # Turn off completely
     set_color(0, 0, 0, 0)
     print("[Sleep Mode] Lights out - Goodnight")
 
-def gentle_sunset(minutes=30):
+async def gentle_sunset(minutes=30):
     """
     Extended sunset with color progression from warm orange to deep red.
     
@@ -53,22 +103,12 @@ def gentle_sunset(minutes=30):
     print(f"[Gentle Sunset] Starting {minutes}-minute sunset sequence")
     steps = int(minutes * 12)
     
-    for i in range(steps, -1, -1):
-        progress = i / steps
-        
-        # Color progression: orange → amber → deep red
-        r = int(255 * progress)
-        g = int(160 * progress * progress)  # Faster fade for green
-        b = int(30 * progress)
-        
-        brightness = 0.4 * progress
-        set_color(r, g, b, brightness)
-        time.sleep(5)
+    await play_ramp_async(_shade_ramp(steps, _sunset_shade), 5000)
     
     set_color(0, 0, 0, 0)
     print("[Gentle Sunset] Sunset complete")
 
-def quick_sleep(minutes=10):
+async def quick_sleep(minutes=10):
     """
     Faster fade for when you're already sleepy.
     
@@ -80,16 +120,13 @@ def quick_sleep(minutes=10):
     print(f"[Quick Sleep] Starting {minutes}-minute quick fade")
     steps = int(minutes * 12)
     
-    for i in range(steps, -1, -1):
-        level = i / steps
-        # Warm red-orange
-        set_color(255, 100, 30, brightness=0.3 * level)
-        time.sleep(5)
+    # Warm red-orange
+    await play_ramp_async(_fade_ramp((255, 100, 30), 0.3, steps), 5000)
     
     set_color(0, 0, 0, 0)
     print("[Quick Sleep] Lights out")
 
-def moonlight_glow(minutes=60, final_brightness=0.05):
+async def moonlight_glow(minutes=60, final_brightness=0.05):
     """
     Very dim blue-white glow that stays on as nightlight.
     
@@ -102,24 +139,19 @@ def moonlight_glow(minutes=60, final_brightness=0.05):
     print(f"[Moonlight] Starting {minutes}-minute fade to nightlight")
     steps = int(minutes * 12)
     
-    # Fade from warm to cool
-    for i in range(steps, -1, -1):
-        progress = i / steps
-        
-        # Transition from warm amber to cool blue-white
-        r = int(255 * progress + 150 * (1 - progress))
-        g = int(160 * progress + 180 * (1 - progress))
-        b = int(80 * progress + 220 * (1 - progress))
-        
-        brightness = 0.3 * progress + final_brightness * (1 - progress)
-        set_color(r, g, b, brightness)
-        time.sleep(5)
+    # Fade from warm amber to cool blue-white
+    def shade(level):
+        rest = 1 - level
+        return (int(255 * level + 150 * rest), int(160 * level + 180 * rest),
+                int(80 * level + 220 * rest), 0.3 * level + final_brightness * rest)
+    
+    await play_ramp_async(_shade_ramp(steps, shade), 5000)
     
     # Hold nightlight indefinitely
     print(f"[Moonlight] Nightlight active at {final_brightness*100:.1f}% brightness")
     set_color(150, 180, 220, brightness=final_brightness)
 
-def reading_light_fade(reading_minutes=30, fade_minutes=15):
+async def reading_light_fade(reading_minutes=30, fade_minutes=15):
     """
     Hold comfortable reading light, then fade to sleep.
     
@@ -134,13 +166,13 @@ def reading_light_fade(reading_minutes=30, fade_minutes=15):
     # Phase 1: Reading light (warm white)
     print("[Reading Light] Reading phase")
     set_color(255, 220, 180, brightness=0.6)
-    time.sleep(reading_minutes * 60)
+    await asyncio.sleep(reading_minutes * 60)
     
     # Phase 2: Fade to sleep
     print("[Reading Light] Fading to sleep...")
-    sleep_fade(color=(255, 160, 80), minutes=fade_minutes)
+    await sleep_fade(color=(255, 160, 80), minutes=fade_minutes)
 
-def campfire_flicker_fade(minutes=25):
+async def campfire_flicker_fade(minutes=25):
     """
     Gentle flickering amber light that slowly fades, like dying campfire.
     
@@ -149,30 +181,16 @@ def campfire_flicker_fade(minutes=25):
     
     Combines subtle random variations with gradual fade.
     """
-    import random
-    
     print(f"[Campfire] Starting {minutes}-minute campfire fade")
     total_steps = int(minutes * 12)
     
-    for step in range(total_steps, -1, -1):
-        base_level = step / total_steps
-        
-        # Random flicker variation
-        flicker = random.uniform(0.85, 1.0)
-        brightness = 0.35 * base_level * flicker
-        
-        # Warm campfire colors
-        r = 255
-        g = int(100 + 60 * base_level)
-        b = int(20 * base_level)
-        
-        set_color(r, g, b, brightness)
-        time.sleep(random.uniform(4.5, 5.5))  # Slight timing variation
+    # Slight timing variation: 4.5-5.5 s per step
+    await play_ramp_async(_shade_ramp(total_steps, _campfire_shade), 5000, jitter_ms=500)
     
     set_color(0, 0, 0, 0)
     print("[Campfire] Fire extinguished")
 
-def progressive_sleep(alert_minutes=10, wind_down_minutes=15, sleep_minutes=20):
+async def progressive_sleep(alert_minutes=10, wind_down_minutes=15, sleep_minutes=20):
     """
     Three-phase sleep preparation: Alert → Wind down → Sleep.
     
@@ -189,22 +207,24 @@ def progressive_sleep(alert_minutes=10, wind_down_minutes=15, sleep_minutes=20):
     # Phase 1: Alert phase (moderate warm white)
     print("[Progressive] Phase 1: Evening activities")
     set_color(255, 200, 150, brightness=0.5)
-    time.sleep(alert_minutes * 60)
+    await asyncio.sleep(alert_minutes * 60)
     
     # Phase 2: Wind down (dimmer amber)
     print("[Progressive] Phase 2: Wind down")
     steps = int(wind_down_minutes * 12)
-    for i in range(steps):
-        progress = i / steps
-        brightness = 0.5 - (0.2 * progress)  # 0.5 → 0.3
-        set_color(255, 180, 100, brightness=brightness)
-        time.sleep(5)
+    if steps > 1:
+        ramp = _shade_ramp(steps - 1, lambda level: (255, 180, 100, 0.3 + 0.2 * level))  # 0.5 → 0.3
+        await play_ramp_async(ramp, 5000)
+    else:
+        # Too short to fade: step straight to the wind-down level
+        set_color(255, 180, 100, brightness=0.3)
+        await asyncio.sleep(wind_down_minutes * 60)
     
     # Phase 3: Sleep fade (deep amber to off)
     print("[Progressive] Phase 3: Sleep fade")
-    sleep_fade(color=(255, 120, 50), minutes=sleep_minutes)
+    await sleep_fade(color=(255, 120, 50), minutes=sleep_minutes)
 
-def breathe_to_sleep(cycles=30, cycle_duration=8):
+async def breathe_to_sleep(cycles=30, cycle_duration=8):
     """
     Breathing pattern that slows to help regulate breathing and sleep.
     
@@ -216,64 +236,64 @@ def breathe_to_sleep(cycles=30, cycle_duration=8):
     """
     print(f"[Breathe to Sleep] {cycles} breathing cycles")
     
+    # One breath (inhale and exhale), rebuilt per cycle in the same buffer
+    breath = bytearray(3 * 40)
+    due = None
     for cycle in range(cycles, 0, -1):
         progress = cycle / cycles
         
         # Gradual slowing of breath
         current_duration = cycle_duration + (12 - cycle_duration) * (1 - progress)
+        step_ms = int(current_duration * 25)  # 40 steps per breath
         
-        # Inhale
-        for i in range(20):
-            brightness = 0.1 + (0.3 * progress * (i / 20))
-            set_color(255, 150, 80, brightness=brightness)
-            time.sleep(current_duration / 40)
+        depth = 0.3 * progress
+        _shade_into(breath, lambda s: (255, 150, 80, 0.1 + depth * s), _BREATH)
         
-        # Exhale
-        for i in range(20, 0, -1):
-            brightness = 0.1 + (0.3 * progress * (i / 20))
-            set_color(255, 150, 80, brightness=brightness)
-            time.sleep(current_duration / 40)
+        due = await play_ramp_async(breath, step_ms, due)
     
     # Final fade out
-    for i in range(20, -1, -1):
-        set_color(255, 150, 80, brightness=0.1 * (i/20))
-        time.sleep(0.2)
+    ramp = _shade_ramp(20, lambda level: (255, 150, 80, 0.1 * level))
+    await play_ramp_async(ramp, 200, due)
     
     set_color(0, 0, 0, 0)
     print("[Breathe to Sleep] Breathing complete - Sleep well")
 
 # --- Preset Sleep Modes ---
 
+# name -> (bedtime coroutine function, positional args)
+# Run one with asyncio.run(start_sleep_mode(name))
 SLEEP_PRESETS = {
-    "standard_sleep": lambda: sleep_fade(minutes=20),
-    "gentle_sunset": lambda: gentle_sunset(minutes=30),
-    "quick_sleep": lambda: quick_sleep(minutes=10),
-    "moonlight": lambda: moonlight_glow(minutes=60, final_brightness=0.05),
-    "reading_fade": lambda: reading_light_fade(reading_minutes=30, fade_minutes=15),
-    "campfire": lambda: campfire_flicker_fade(minutes=25),
-    "progressive": lambda: progressive_sleep(alert_minutes=10, wind_down_minutes=15, sleep_minutes=20),
-    "breathe": lambda: breathe_to_sleep(cycles=30, cycle_duration=8),
+    "standard_sleep": (sleep_fade, ((255, 160, 80), 20)),   # color, minutes
+    "gentle_sunset": (gentle_sunset, (30,)),
+    "quick_sleep": (quick_sleep, (10,)),
+    "moonlight": (moonlight_glow, (60, 0.05)),              # minutes, final brightness
+    "reading_fade": (reading_light_fade, (30, 15)),         # reading, fade minutes
+    "campfire": (campfire_flicker_fade, (25,)),
+    "progressive": (progressive_sleep, (10, 15, 20)),       # alert, wind down, sleep minutes
+    "breathe": (breathe_to_sleep, (30, 8)),                 # cycles, seconds per cycle
 }
 
-def start_sleep_mode(preset_name):
+async def start_sleep_mode(preset_name):
     """
     Start a preset sleep/bedtime sequence.
     
     Args:
         preset_name: Name from SLEEP_PRESETS
     """
-    if preset_name in SLEEP_PRESETS:
+    preset = SLEEP_PRESETS.get(preset_name)
+    if preset is not None:
         print(f"\n{'='*50}")
         print(f"Sleep Mode: {preset_name}")
         print(f"{'='*50}\n")
-        SLEEP_PRESETS[preset_name]()
+        func, args = preset
+        await func(*args)
     else:
         print(f"[Error] Unknown preset: {preset_name}")
         print(f"Available presets: {', '.join(SLEEP_PRESETS.keys())}")
 
 # --- Helper Functions ---
 
-def night_light(brightness=0.05, color=(150, 180, 220)):
+async def night_light(brightness=0.05, color=(150, 180, 220)):
     """
     Static nightlight mode - stays on indefinitely.
     
@@ -282,15 +302,17 @@ def night_light(brightness=0.05, color=(150, 180, 220)):
         color: RGB tuple (default: cool blue-white)
     """
     print(f"[Night Light] Active at {brightness*100:.1f}% brightness")
-    print("[Night Light] Press Ctrl+C to turn off")
+    print("[Night Light] Cancel the task to turn off")
     
     set_color(*color, brightness=brightness)
     
     try:
         while True:
-            time.sleep(60)
-    except KeyboardInterrupt:
+            await asyncio.sleep(60)
+    except asyncio.CancelledError:
         print("\n[Night Light] Turning off...")
+        raise
+    finally:
         set_color(0, 0, 0, 0)
 
 def emergency_off():
@@ -300,7 +322,7 @@ def emergency_off():
 
 # --- Scheduler Integration ---
 
-def schedule_bedtime(bedtime_hour, bedtime_minute, fade_minutes=20):
+async def schedule_bedtime(bedtime_hour, bedtime_minute, fade_minutes=20):
     """
     Schedule sleep fade to complete at specified bedtime.
     
@@ -308,41 +330,30 @@ def schedule_bedtime(bedtime_hour, bedtime_minute, fade_minutes=20):
         bedtime_hour: Hour for lights out (24-hour format)
         bedtime_minute: Minute for lights out
         fade_minutes: Duration of fade (default: 20)
-    """
-    import time
     
+    Wakes once a day, at the fade start. Run it as an asyncio task so
+    other tasks (nightlight, network) keep running while it waits.
+    """
     print(f"[Scheduler] Bedtime set for {bedtime_hour:02d}:{bedtime_minute:02d}")
     
+    # Start time (fade_minutes before bedtime) as seconds past midnight
+    start_seconds = (bedtime_hour * 3600 + bedtime_minute * 60 - int(fade_minutes * 60)) % 86400
+    
     while True:
         current_time = time.localtime()
-        current_hour = current_time[3]
-        current_minute = current_time[4]
-        
-        # Calculate start time
-        start_hour = bedtime_hour
-        start_minute = bedtime_minute - fade_minutes
+        current_seconds = current_time[3] * 3600 + current_time[4] * 60 + current_time[5]
         
-        if start_minute < 0:
-            start_minute += 60
-            start_hour -= 1
+        # Sleep straight through to the next start (today or tomorrow)
+        wait = (start_seconds - current_seconds) % 86400
+        print(f"[Scheduler] Next sleep fade starts in {wait // 60} min")
+        await asyncio.sleep(wait)
         
-        if start_hour < 0:
-            start_hour += 24
-        
-        # Check if it's time to start
-        if current_hour == start_hour and current_minute == start_minute:
-            print(f"[Scheduler] Starting sleep fade for {bedtime_hour:02d}:{bedtime_minute:02d} bedtime")
-            sleep_fade(minutes=fade_minutes)
-            
-            # Sleep until next day
-            time.sleep(86400)  # 24 hours
-        
-        # Check every minute
-        time.sleep(60)
+        print(f"[Scheduler] Starting sleep fade for {bedtime_hour:02d}:{bedtime_minute:02d} bedtime")
+        await sleep_fade(minutes=fade_minutes)
 
 # --- Demo Mode ---
 
-def demo_sleep_modes():
+async def demo_sleep_modes():
     """Quick demo of sleep modes."""
     print("Sleep Mode Demo - Starting...\n")
     
@@ -354,8 +365,8 @@ def demo_sleep_modes():
     
     for name, func in demos:
         print(f"Demo: {name}")
-        func()
-        time.sleep(2)
+        await func()
+        await asyncio.sleep(2)
     
     print("\nSleep Mode Demo - Complete")
 
@@ -367,5 +378,9 @@ if __name__ == "__main__":
     print()
     
     # Run demo or specific mode
-    # demo_sleep_modes()
-    start_sleep_mode("standard_sleep")
+    # asyncio.run(demo_sleep_modes())
+    try:
+        asyncio.run(start_sleep_mode("standard_sleep"))
+    finally:
+        # Ctrl+C stops the scheduler, not the fade, so switch off here
+        set_color(0, 0, 0, 0)
@@ -5,34 +5,96 @@
 
 import network
 import time
+import binascii
+import uasyncio as asyncio
 
 wlan = network.WLAN(network.STA_IF)
 wlan.active(True)
 
+# Last RSSI reading as (ticks_ms, dBm), reused for RSSI_CACHE_MS
+RSSI_CACHE_MS = 1000
+_rssi_cache = (0, None)
+
+# --- Signal Lookup Tables ---
+# Indexed by _level(rssi): rssi + 100 clamped to 0-60 (-100 to -40 dBm)
+
+# Bars 0-5: one more per 10 dB above -100 dBm, 5 from -50 dBm up
+_BARS = bytes(min(5, i // 10) for i in range(61))
+_DESCRIPTIONS = ("Very Poor", "Poor", "Fair", "Good", "Very Good", "Excellent")  # by bars
+
+# Colors by _COLOR_INDEX: red < -85, orange, yellow from -80, yellow-green from -70, green from -60
+_COLORS = ((255, 0, 0), (255, 150, 0), (255, 255, 0), (150, 255, 0), (0, 255, 0))
+_COLOR_INDEX = bytes((i >= 15) + (i >= 20) + (i >= 30) + (i >= 40) for i in range(61))
+
+# wlan.scan() security codes 0-4; others print as "Type N"
+_SECURITY = ("Open", "WEP", "WPA-PSK", "WPA2-PSK", "WPA/WPA2-PSK")
+
+def _level(rssi):
+    """Clamp rssi + 100 to 0-60, the index into the lookup tables."""
+    i = rssi + 100
+    return 0 if i < 0 else (60 if i > 60 else i)
+
 # --- Core WiFi Functions ---
 
+def _scan_strength():
+    """Find the connected network's RSSI in a full scan (slow, 1-4 s)."""
+    current = wlan.config('essid')
+    
+    try:
+        nets = wlan.scan()
+        for n in nets:
+            if n[0].decode() == current:
+                return n[3]  # RSSI value
+    except Exception as e:
+        print(f"[WiFi] Scan error: {e}")
+    
+    return None
+
 def get_strength():
     """
     Return the RSSI (dBm) of the connected Wi-Fi network or None.
     
+    Reads wlan.status('rssi') where the port supports it, falling back
+    to a full scan otherwise. Readings are reused for RSSI_CACHE_MS.
+    
     Returns:
         int: RSSI in dBm (-90 to -30 typical range)
         None: If not connected or scan fails
     """
+    global _rssi_cache
     if not wlan.isconnected():
         return None
     
-    current = wlan.config('essid')
+    stamp, rssi = _rssi_cache
+    now = time.ticks_ms()
+    if rssi is not None and time.ticks_diff(now, stamp) < RSSI_CACHE_MS:
+        return rssi
     
     try:
-        nets = wlan.scan()
-        for n in nets:
-            if n[0].decode() == current:
-                return n[3]  # RSSI value
-    except Exception as e:
-        print(f"[WiFi] Scan error: {e}")
+        rssi = wlan.status('rssi')
+    except (OSError, ValueError):
+        rssi = _scan_strength()
     
-    return None
+    _rssi_cache = (now, rssi)
+    return rssi
+
+def strength_to_quality(rssi):
+    """
+    Convert RSSI to signal quality as percentage (0-100%).
+    
+    Args:
+        rssi: Signal strength in dBm, or None
+    
+    Returns:
+        int: Signal quality percentage
+        None: If rssi is None
+    """
+    if rssi is None:
+        return None
+    
+    # Convert RSSI to quality percentage
+    # -30 dBm = 100%, -90 dBm = 0%
+    return min(100, max(0, 2 * (rssi + 100)))
 
 def get_signal_quality():
     """
@@ -42,14 +104,23 @@ def get_signal_quality():
         int: Signal quality percentage
         None: If not connected
     """
-    rssi = get_strength()
+    return strength_to_quality(get_strength())
+
+def strength_to_bars(rssi):
+    """
+    Convert RSSI to 0-5 signal bars.
+    
+    Args:
+        rssi: Signal strength in dBm, or None
+    
+    Returns:
+        int: Number of bars (0-5)
+        None: If rssi is None
+    """
     if rssi is None:
         return None
     
-    # Convert RSSI to quality percentage
-    # -30 dBm = 100%, -90 dBm = 0%
-    quality = min(100, max(0, 2 * (rssi + 100)))
-    return quality
+    return _BARS[_level(rssi)]
 
 def get_signal_bars():
     """
@@ -59,23 +130,7 @@ def get_signal_bars():
         int: Number of bars (0-5)
         None: If not connected
     """
-    rssi = get_strength()
-    if rssi is None:
-        return None
-    
-    # Signal bars based on typical RSSI ranges
-    if rssi >= -50:
-        return 5  # Excellent
-    elif rssi >= -60:
-        return 4  # Very Good
-    elif rssi >= -70:
-        return 3  # Good
-    elif rssi >= -80:
-        return 2  # Fair
-    elif rssi >= -90:
-        return 1  # Poor
-    else:
-        return 0  # Very Poor
+    return strength_to_bars(get_strength())
 
 def strength_to_brightness(rssi):
     """
@@ -107,21 +162,29 @@ def strength_to_color(rssi):
     if rssi is None:
         return (100, 100, 100)  # Gray for disconnected
     
-    if rssi >= -60:
-        # Excellent: Green
-        return (0, 255, 0)
-    elif rssi >= -70:
-        # Good: Yellow-green
-        return (150, 255, 0)
-    elif rssi >= -80:
-        # Fair: Yellow
-        return (255, 255, 0)
-    elif rssi >= -85:
-        # Poor: Orange
-        return (255, 150, 0)
-    else:
-        # Very Poor: Red
-        return (255, 0, 0)
+    return _COLORS[_COLOR_INDEX[_level(rssi)]]
+
+_display_cache = (None, None)  # (rssi, strength_to_display result)
+
+def strength_to_display(rssi):
+    """
+    Convert RSSI to LED color and brightness in one call.
+    
+    The result for the last RSSI seen is kept, since consecutive readings
+    usually repeat.
+    
+    Args:
+        rssi: Signal strength in dBm, or None
+    
+    Returns:
+        tuple: (red, green, blue, brightness)
+    """
+    global _display_cache
+    last, display = _display_cache
+    if display is None or rssi != last:
+        display = strength_to_color(rssi) + (strength_to_brightness(rssi),)
+        _display_cache = (rssi, display)
+    return display
 
 def get_connection_info():
     """
@@ -139,10 +202,10 @@ def get_connection_info():
         'connected': True,
         'ssid': wlan.config('essid'),
         'rssi': rssi,
-        'quality': get_signal_quality(),
-        'bars': get_signal_bars(),
+        'quality': strength_to_quality(rssi),
+        'bars': strength_to_bars(rssi),
         'ip': wlan.ifconfig()[0],
-        'mac': ':'.join(['%02x' % b for b in wlan.config('mac')]),
+        'mac': binascii.hexlify(wlan.config('mac'), ':').decode(),
         'channel': wlan.config('channel') if hasattr(wlan, 'channel') else None
     }
 
@@ -174,60 +237,59 @@ def get_quality_description(rssi):
     """
     if rssi is None:
         return "Disconnected"
-    elif rssi >= -50:
-        return "Excellent"
-    elif rssi >= -60:
-        return "Very Good"
-    elif rssi >= -70:
-        return "Good"
-    elif rssi >= -80:
-        return "Fair"
-    elif rssi >= -90:
-        return "Poor"
-    else:
-        return "Very Poor"
+    
+    return _DESCRIPTIONS[_BARS[_level(rssi)]]
 
 # --- WiFi Monitoring Functions ---
 
-def monitor_signal(duration_seconds=60, interval_seconds=5):
+async def monitor_signal(duration_seconds=60, interval_seconds=5):
     """
     Monitor WiFi signal strength over time.
     
     Args:
         duration_seconds: How long to monitor (default: 60)
         interval_seconds: Time between checks (default: 5)
+    
+    Runs as a coroutine so LED patterns and other tasks keep going.
     """
     print(f"[WiFi Monitor] Monitoring signal for {duration_seconds} seconds")
     print("Time | RSSI  | Quality | Bars | Status")
     print("-----|-------|---------|------|--------")
     
     elapsed = 0
-    readings = []
+    # Running totals instead of a list of readings
+    count = 0
+    total = 0
+    min_rssi = 0
+    max_rssi = -128
     
     while elapsed < duration_seconds:
         rssi = get_strength()
-        quality = get_signal_quality()
-        bars = get_signal_bars()
+        quality = strength_to_quality(rssi)
+        bars = strength_to_bars(rssi)
         status = get_quality_description(rssi)
         
         if rssi is not None:
-            readings.append(rssi)
+            if count == 0 or rssi < min_rssi:
+                min_rssi = rssi
+            if rssi > max_rssi:
+                max_rssi = rssi
+            total += rssi
+            count += 1
             bars_display = '█' * bars + '░' * (5 - bars)
             print(f"{elapsed:4d}s | {rssi:4d} | {quality:6d}% | {bars_display} | {status}")
         else:
             print(f"{elapsed:4d}s | N/A   | N/A     | ░░░░░ | Disconnected")
         
-        time.sleep(interval_seconds)
+        await asyncio.sleep(interval_seconds)
         elapsed += interval_seconds
     
     # Summary
-    if readings:
-        avg_rssi = sum(readings) / len(readings)
-        min_rssi = min(readings)
-        max_rssi = max(readings)
+    if count:
+        avg_rssi = total / count
         print(f"\n[Summary] Avg: {avg_rssi:.1f} dBm | Min: {min_rssi} | Max: {max_rssi}")
 
-def signal_stability_check(samples=10, interval_seconds=2):
+async def signal_stability_check(samples=10, interval_seconds=2):
     """
     Check signal stability by taking multiple samples.
     
@@ -247,7 +309,7 @@ def signal_stability_check(samples=10, interval_seconds=2):
         if rssi is not None:
             readings.append(rssi)
             print(f"  Sample {i+1}/{samples}: {rssi} dBm")
-        time.sleep(interval_seconds)
+        await asyncio.sleep(interval_seconds)
     
     if not readings:
         print("[Stability Check] No valid readings")
@@ -303,25 +365,14 @@ def scan_networks():
         
         for net in nets:
             ssid = net[0].decode()
-            bssid = ':'.join(['%02x' % b for b in net[1]])
+            bssid = binascii.hexlify(net[1], ':').decode()
             channel = net[2]
             rssi = net[3]
             security = net[4]
             hidden = net[5]
             
             # Determine security type
-            if security == 0:
-                sec_type = "Open"
-            elif security == 1:
-                sec_type = "WEP"
-            elif security == 2:
-                sec_type = "WPA-PSK"
-            elif security == 3:
-                sec_type = "WPA2-PSK"
-            elif security == 4:
-                sec_type = "WPA/WPA2-PSK"
-            else:
-                sec_type = f"Type {security}"
+            sec_type = _SECURITY[security] if 0 <= security < 5 else f"Type {security}"
             
             networks.append({
                 'ssid': ssid,
@@ -333,7 +384,6 @@ def scan_networks():
             })
             
             # Print network info
-            quality = get_quality_description(rssi)
             ssid_display = ssid[:23] if len(ssid) <= 23 else ssid[:20] + "..."
             print(f"{ssid_display:23} | {rssi:4d}  | {channel:7d} | {sec_type}")
         
@@ -345,7 +395,17 @@ def scan_networks():
 
 # --- Connection Helpers ---
 
-def wait_for_connection(timeout_seconds=30):
+async def _until_connected():
+    """Check the connection once a second until it is up."""
+    elapsed = 0
+    while not wlan.isconnected():
+        await asyncio.sleep(1)
+        elapsed += 1
+        
+        if elapsed % 5 == 0:
+            print(f"[WiFi] Still waiting... ({elapsed}s)")
+
+async def wait_for_connection(timeout_seconds=30):
     """
     Wait for WiFi connection with timeout.
     
@@ -357,23 +417,17 @@ def wait_for_connection(timeout_seconds=30):
     """
     print("[WiFi] Waiting for connection...")
     
-    elapsed = 0
-    while elapsed < timeout_seconds:
-        if wlan.isconnected():
-            info = get_connection_info()
-            print(f"[WiFi] Connected to {info['ssid']}")
-            print(f"       IP: {info['ip']}")
-            print(f"       Signal: {info['rssi']} dBm ({get_quality_description(info['rssi'])})")
-            return True
-        
-        time.sleep(1)
-        elapsed += 1
-        
-        if elapsed % 5 == 0:
-            print(f"[WiFi] Still waiting... ({elapsed}s)")
+    try:
+        await asyncio.wait_for(_until_connected(), timeout_seconds)
+    except asyncio.TimeoutError:
+        print("[WiFi] Connection timeout")
+        return False
     
-    print("[WiFi] Connection timeout")
-    return False
+    info = get_connection_info()
+    print(f"[WiFi] Connected to {info['ssid']}")
+    print(f"       IP: {info['ip']}")
+    print(f"       Signal: {info['rssi']} dBm ({get_quality_description(info['rssi'])})")
+    return True
 
 def is_signal_adequate(min_rssi=-80):
     """
@@ -411,8 +465,8 @@ def demo():
     rssi = get_strength()
     if rssi:
         print(f"   RSSI: {rssi} dBm")
-        print(f"   Quality: {get_signal_quality()}%")
-        print(f"   Bars: {'█' * get_signal_bars()}")
+        print(f"   Quality: {strength_to_quality(rssi)}%")
+        print(f"   Bars: {'█' * strength_to_bars(rssi)}")
         print(f"   Color: {strength_to_color(rssi)}")
         print(f"   Brightness: {strength_to_brightness(rssi):.2f}")
     
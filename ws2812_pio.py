@@ -0,0 +1,98 @@
+# ws2812_pio.py
+# PIO-driven WS2812 output for RP2040 boards (Pico / Pico W)
+# Author: Daphne Castellow
+# License: MIT
+#
+# Drop-in for neopixel.NeoPixel: same np[i] = (r, g, b), np.buf and
+# np.write(), but the bit timing is clocked out by a PIO state machine
+# instead of being bit-banged by the CPU. Where the firmware has rp2.DMA,
+# write() copies buf into a second transmit buffer and hands it to DMA,
+# so it returns at once and the caller can fill the next frame while the
+# current one shifts out. Modules import it first and fall back to the
+# stock neopixel driver on other boards (ESP32's neopixel already drives
+# the RMT peripheral).
+
+import time
+import rp2
+
+# --- PIO Program ---
+
+# 800 kHz WS2812 bit: 10 PIO cycles per bit at 8 MHz
+@rp2.asm_pio(sideset_init=rp2.PIO.OUT_LOW, out_shiftdir=rp2.PIO.SHIFT_LEFT,
+             autopull=True, pull_thresh=8)
+def _ws2812():
+    T1 = 2
+    T2 = 5
+    T3 = 3
+    wrap_target()
+    label("bitloop")
+    out(x, 1)               .side(0)    [T3 - 1]
+    jmp(not_x, "do_zero")   .side(1)    [T1 - 1]
+    jmp("bitloop")          .side(1)    [T2 - 1]
+    label("do_zero")
+    nop()                   .side(0)    [T2 - 1]
+    wrap()
+
+# --- Driver ---
+
+class WS2812:
+    """NeoPixel-compatible WS2812 strip on a PIO state machine."""
+
+    def __init__(self, pin, n, sm_id=0):
+        """
+        Args:
+            pin: machine.Pin wired to the LED data line
+            n: Number of LEDs
+            sm_id: PIO state machine to use (default: 0)
+        """
+        self.n = n
+        self.buf = bytearray(3 * n)  # GRB order, like neopixel.NeoPixel
+        self._sm = rp2.StateMachine(sm_id, _ws2812, freq=8_000_000, sideset_base=pin)
+        self._sm.active(1)
+        
+        # Frame time: 30 us per LED plus the 50 us+ reset (latch) gap
+        self._frame_us = 30 * n + 80
+        self._ready = time.ticks_us()
+        
+        # DMA double buffer: buf is filled by the caller, _tx is in flight
+        try:
+            self._dma = rp2.DMA()
+        except AttributeError:  # firmware without rp2.DMA
+            self._dma = None
+        else:
+            self._tx = bytearray(3 * n)
+            # Byte transfers into the FIFO (the bus replicates each byte across
+            # the word, so the top 8 bits shifted out are that byte), paced by
+            # this state machine's TX DREQ (PIO0 TX0-3 = 0-3, PIO1 TX0-3 = 8-11)
+            treq = sm_id if sm_id < 4 else sm_id + 4
+            self._ctrl = self._dma.pack_ctrl(size=0, inc_write=False, treq_sel=treq)
+
+    def __len__(self):
+        return self.n
+
+    def __setitem__(self, i, rgb):
+        o = 3 * i
+        self.buf[o + 1], self.buf[o], self.buf[o + 2] = rgb
+
+    def __getitem__(self, i):
+        o = 3 * i
+        return (self.buf[o + 1], self.buf[o], self.buf[o + 2])
+
+    def fill(self, rgb):
+        for i in range(self.n):
+            self[i] = rgb
+
+    def write(self):
+        """Send buf to the LEDs; with DMA this returns before the frame is out."""
+        # Let the previous frame finish and latch before starting the next
+        while time.ticks_diff(self._ready, time.ticks_us()) > 0:
+            pass
+        
+        if self._dma is None:
+            # One byte per FIFO word, MSB first
+            self._sm.put(self.buf, 24)
+        else:
+            self._tx[:] = self.buf
+            self._dma.config(read=self._tx, write=self._sm, count=len(self._tx),
+                             ctrl=self._ctrl, trigger=True)
+        self._ready = time.ticks_add(time.ticks_us(), self._frame_us)